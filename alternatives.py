@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+EMPTY_IDS = np.empty(0, dtype=np.int64)
+
+
+class AlternativeIndex:
+    # Equivalence groups of medicines with the same active ingredients: the
+    # key is the multiset of (salt, strength) over both composition slots,
+    # with salts and strengths normalized by the composition engine, so slot
+    # order and spelling variants like "500 mg" / "500mg" do not matter.
+    # Each group's rows are kept in ascending price order (missing prices
+    # last, ties in dataset order) as one flat array sliced by offsets.
+    def __init__(self, engine, price_rank):
+        # One code per distinct (salt, strength) pair; an empty slot (-1)
+        # indexes the trailing -1
+        pair_codes = (engine.composition_salt.astype(np.int64) * max(len(engine.strengths), 1) +
+                      engine.composition_strength)
+        pairs = np.sort(np.append(pair_codes, -1)[engine.row_compositions], axis=1)
+
+        # Combine the sorted slots into one key per row
+        base = int(pair_codes.max()) + 2 if len(pair_codes) else 1
+        keys = np.zeros(len(pairs), dtype=np.int64)
+        for slot in range(pairs.shape[1]):
+            keys = keys * base + pairs[:, slot] + 1
+        has_key = (pairs >= 0).any(axis=1)
+
+        codes, unique_keys = pd.factorize(keys[has_key])
+        groups = np.full(len(keys), -1, dtype=np.int64)
+        groups[has_key] = codes
+        self.row_groups = groups
+
+        rows = np.flatnonzero(has_key)
+        order = np.lexsort((price_rank[rows], groups[rows]))
+        self.rows = rows[order]
+        counts = np.bincount(groups[rows], minlength=len(unique_keys))
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def group_rows(self, row):
+        # Rows equivalent to row (itself included), cheapest first
+        group = self.row_groups[row]
+        if group < 0:
+            return EMPTY_IDS
+        return self.rows[self.offsets[group]:self.offsets[group + 1]]
+
+
+def savings_percent(price, prices):
+    # How much cheaper each of prices is than price, in percent (negative when
+    # dearer); None where either price is missing or price is not positive
+    if not np.isfinite(price) or price <= 0:
+        return [None] * len(prices)
+    savings = np.round((price - prices) / price * 100, 1)
+    return [None if np.isnan(value) else value for value in savings.tolist()]
@@ -1,121 +1,365 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, g
+from flask.json.provider import DefaultJSONProvider
 import pandas as pd
+import numpy as np
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
 from medicine_analysis import MedicineAnalyzer
+from compression import COMPRESSIBLE_TYPES, MIN_COMPRESS_BYTES, compress, compress_chunks, negotiate
+from dashboard_snapshot import DashboardSnapshot, Payload
+from facet_index import CATEGORY_FACETS, DEFAULT_FACET_LIMIT
+from metrics import CONTENT_TYPE, Counter, Gauge, Histogram, Registry, StackSampler
+from pagination import EXPORT_FORMATS, MAX_PAGE_SIZE, export_chunks, next_cursor, page_rows, parse_cursor
+from alternatives import savings_percent
+from records import ALTERNATIVE_FIELDS, SIBLING_FIELDS, SUBSTITUTE_FIELDS
+from therapeutic import load_classes
+
+class DatasetJSONProvider(DefaultJSONProvider):
+    # Values read out of single DataFrame rows are numpy scalars (bool_, int64, ...)
+    @staticmethod
+    def default(o):
+        if isinstance(o, np.generic):
+            return o.item()
+        return DefaultJSONProvider.default(o)
 
 app = Flask(__name__)
+app.json = DatasetJSONProvider(app)
 
-# Global variable to store analyzer
+# Global variables to store analyzer and its precomputed dashboard aggregates.
+# loaded holds the pair as one tuple: a reload replaces it in a single
+# assignment and each request reads it once, so no request mixes versions.
 analyzer = None
+snapshot = None
+loaded = (None, None)
+
+# Delta CSVs in PHARMAVISION_DELTA_DIR are applied on top of the dataset in
+# file name order; the process serving requests (or the preloading gunicorn
+# master) checks for new ones every few seconds
+DELTA_POLL_SECONDS = 5
+delta_lock = threading.Lock()
+applied_deltas = {}
+last_delta_check = 0.0
+# Cleared by gunicorn.conf.py in preloaded workers, whose master applies the deltas
+worker_deltas = True
+
+def encode_json(data):
+    # Exactly the bytes jsonify() would send for data
+    return app.json.response(data).get_data()
+
+def install_analyzer(new_analyzer, last_modified=None):
+    # Derived state is rebuilt whenever the dataset is (re)loaded
+    global analyzer, snapshot, loaded
+    loaded = (new_analyzer, DashboardSnapshot(new_analyzer, encode_json, last_modified))
+    analyzer, snapshot = loaded
+
+def price_stats_cache_counts():
+    # Non-default /api/price-stats histograms served from the snapshot's lru_cache
+    snapshot = loaded[1]
+    if not snapshot:
+        return {}
+    info = snapshot.price_stats_payload.cache_info()
+    return {('price_stats', 'hit'): info.hits, ('price_stats', 'miss'): info.misses}
+
+# Prometheus metrics, per worker process: every series carries the worker's
+# pid, so a scrape answered by another worker shows up as another series
+# instead of a counter reset. Stage timers split a request into index
+# lookups, pandas work and serialization.
+registry = Registry(constant_labels=lambda: {'worker': os.getpid()})
+request_seconds = registry.add(Histogram(
+    'pharmavision_request_duration_seconds', 'Time to build the response, by route.', ('route', 'method')))
+requests_total = registry.add(Counter(
+    'pharmavision_requests_total', 'Responses sent, by route and status.', ('route', 'method', 'status')))
+stage_seconds = registry.add(Histogram(
+    'pharmavision_stage_duration_seconds', 'Time spent in one stage of a request.', ('route', 'stage')))
+cache_requests = registry.add(Counter(
+    'pharmavision_cache_requests_total', 'Cache lookups by cache and result (hit or miss).', ('cache', 'result'),
+    collect=price_stats_cache_counts))
+registry.add(Gauge(
+    'pharmavision_dataset_rows', 'Rows in the loaded dataset.',
+    collect=lambda: {(): len(loaded[0].df)} if loaded[0] else {}))
+registry.add(Gauge(
+    'pharmavision_dataset_memory_bytes', 'Memory held by each dataset column, objects included.', ('column',),
+    collect=lambda: {(column,): info['bytes'] for column, info in loaded[1].memory['columns'].items()} if loaded[1] else {}))
+
+# PHARMAVISION_PROFILE_ROUTES=/api/search,/api/filter-by-company (or *) samples
+# the stacks of requests to those routes; read them from /metrics/profile
+PROFILE_ROUTES = [route.strip() for route in os.environ.get('PHARMAVISION_PROFILE_ROUTES', '').split(',') if route.strip()]
+sampler = StackSampler(PROFILE_ROUTES, int(os.environ.get('PHARMAVISION_PROFILE_INTERVAL_MS', '5')) / 1000) if PROFILE_ROUTES else None
+
+def route_label():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@contextmanager
+def stage(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe((route_label(), name), time.perf_counter() - start)
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+    if sampler and sampler.wants(route_label()):
+        sampler.track(route_label())
+
+@app.after_request
+def record_request(response):
+    # Streamed bodies (/api/export) are timed up to their first byte
+    route = route_label()
+    request_seconds.observe((route, request.method), time.perf_counter() - g.request_start)
+    requests_total.inc((route, request.method, str(response.status_code)))
+    return response
+
+@app.after_request
+def compress_response(response):
+    # Compress what was not precompressed, if the client accepts it and the
+    # body is big enough; streamed bodies (/api/export) as they are sent
+    if (response.status_code != 200 or response.content_encoding or response.direct_passthrough or
+            response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+    if response.is_streamed:
+        response.response = compress_chunks(response.iter_encoded(), encoding)
+    else:
+        body = response.get_data()
+        if len(body) < MIN_COMPRESS_BYTES:
+            return response
+        response.set_data(compress(body, encoding))
+    response.content_encoding = encoding
+    return response
+
+@app.teardown_request
+def stop_sampling(exc):
+    if sampler:
+        sampler.untrack()
+
+def delta_files():
+    delta_dir = os.environ.get('PHARMAVISION_DELTA_DIR')
+    if not delta_dir or not os.path.isdir(delta_dir):
+        return []
+    return [os.path.join(delta_dir, name) for name in sorted(os.listdir(delta_dir)) if name.endswith('.csv')]
+
+def pending_deltas():
+    # (path, version) of the delta files not applied yet (or rewritten since),
+    # up to the first one that failed in its current version
+    pending = []
+    for path in delta_files():
+        stat = os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+        state = applied_deltas.get(path)
+        if state == version:
+            continue
+        if state == ('failed', version):
+            break
+        pending.append((path, version))
+    return pending
+
+def build_deltas(updated, pending):
+    # Apply pending deltas in order to new analyzers; the first that raises is
+    # marked failed and stops the rest
+    built = []
+    for path, version in pending:
+        try:
+            updated = updated.apply_delta(path)
+        except Exception as e:
+            print(f"Error applying delta {path}: {e}")
+            applied_deltas[path] = ('failed', version)
+            break
+        print(f"Applied delta {path}: {updated.delta_counts}")
+        built.append((path, version))
+    return updated, built
+
+def install_one_at_a_time(pending):
+    # After the combined result failed to install: apply and install each
+    # delta on its own, so the ones before the bad one still go in
+    applied = 0
+    for path, version in pending:
+        try:
+            install_analyzer(loaded[0].apply_delta(path))
+        except Exception as e:
+            print(f"Error installing delta {path}: {e}")
+            applied_deltas[path] = ('failed', version)
+            break
+        applied_deltas[path] = version
+        applied += 1
+    return applied
+
+def apply_deltas():
+    # Apply the new delta files to a new analyzer built from the current one,
+    # then install it. Requests keep being served from the current version
+    # until the swap, and a delta only counts as applied once installed. A
+    # delta that fails is not retried until its file changes, and later ones
+    # wait for it.
+    if not delta_lock.acquire(blocking=False):
+        return 0
+    try:
+        if loaded[0] is None:
+            return 0
+        updated, built = build_deltas(loaded[0], pending_deltas())
+        if not built:
+            return 0
+        try:
+            install_analyzer(updated)
+        except Exception as e:
+            print(f"Error installing deltas: {e}")
+            return install_one_at_a_time(built)
+        for path, version in built:
+            applied_deltas[path] = version
+        return len(built)
+    finally:
+        delta_lock.release()
+
+@app.before_request
+def poll_deltas():
+    global last_delta_check
+    if (not worker_deltas or not os.environ.get('PHARMAVISION_DELTA_DIR') or
+            time.monotonic() - last_delta_check < DELTA_POLL_SECONDS):
+        return
+    last_delta_check = time.monotonic()
+    if not delta_lock.locked():
+        threading.Thread(target=apply_deltas, daemon=True).start()
 
 def load_data():
-    global analyzer
     try:
-        # Get the absolute path to the CSV file (safe for Render)
+        # Get the absolute path to the CSV file (safe for Render); PHARMAVISION_CSV overrides it
         BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-        csv_path = os.path.join(BASE_DIR, 'A_Z_medicines_dataset_of_India.csv')
+        csv_path = os.environ.get('PHARMAVISION_CSV') or os.path.join(BASE_DIR, 'A_Z_medicines_dataset_of_India.csv')
         
         print(f"Looking for dataset at: {csv_path}")
         if not os.path.exists(csv_path):
             print("⚠️ CSV file not found at that path")
             return False
             
-        analyzer = MedicineAnalyzer(csv_path)
-        return True
+        # PHARMAVISION_CLASSES: a JSON file of therapeutic classes to add to (or redefine) the defaults
+        classes_path = os.environ.get('PHARMAVISION_CLASSES')
+        classes = load_classes(classes_path) if classes_path else None
+        
+        install_analyzer(MedicineAnalyzer(csv_path, classes=classes), os.path.getmtime(csv_path))
+        applied_deltas.clear()
     except Exception as e:
         print(f"Error loading data: {e}")
-    return False
+        return False
+    
+    # The base data is serving even if the deltas cannot be applied
+    try:
+        apply_deltas()
+    except Exception as e:
+        print(f"Error applying deltas: {e}")
+    return True
+
+# The page does not depend on the data, so it is rendered (and compressed) once
+with app.app_context():
+    index_page = Payload(render_template('index.html').encode('utf-8'), compress=True)
+
+def payload_response(payload, mimetype):
+    # The precompressed copy the client prefers, else the plain body; each
+    # has its own ETag
+    encoding = negotiate(request.accept_encodings, payload.encoded)
+    if encoding is None:
+        response = app.response_class(payload.body, mimetype=mimetype)
+        response.set_etag(payload.etag)
+    else:
+        response = app.response_class(payload.encoded[encoding], mimetype=mimetype)
+        response.content_encoding = encoding
+        response.set_etag(f'{payload.etag}-{encoding}')
+    if payload.encoded:
+        response.vary.add('Accept-Encoding')
+    return response
 
 @app.route('/')
 def index():
-    return render_template('index.html')
+    return payload_response(index_page, 'text/html').make_conditional(request)
 
-@app.route('/api/manufacturers')
-def get_manufacturers():
-    if not analyzer:
+def snapshot_response(section, payload=None, snapshot=None):
+    snapshot = snapshot or loaded[1]
+    if not snapshot:
         return jsonify({'error': 'Data not loaded'})
     
-    top_manufacturers = analyzer.df['manufacturer_name'].value_counts().head(15)
-    return jsonify({
-        'labels': top_manufacturers.index.tolist(),
-        'data': top_manufacturers.values.tolist()
-    })
+    # Pre-encoded body; clients revalidate with If-None-Match / If-Modified-Since
+    if payload is None:
+        payload = snapshot.payloads[section]
+    response = payload_response(payload, app.json.mimetype)
+    response.last_modified = snapshot.last_modified
+    response.cache_control.no_cache = True
+    response = response.make_conditional(request)
+    cache_requests.inc(('http_conditional', 'hit' if response.status_code == 304 else 'miss'))
+    return response
+
+def json_object(fields):
+    # The JSON object jsonify(fields) would write, except values already given
+    # as JSON bytes are spliced in as-is
+    parts = []
+    for key in sorted(fields):
+        value = fields[key]
+        if not isinstance(value, bytes):
+            value = app.json.dumps(value, separators=(',', ':')).encode('utf-8')
+        parts.append(app.json.dumps(key).encode('utf-8') + b':' + value)
+    return b'{' + b','.join(parts) + b'}'
+
+def json_response(fields):
+    return app.response_class(json_object(fields) + b'\n', mimetype=app.json.mimetype)
+
+def page_args(default_limit):
+    # ?limit=&offset= and/or ?cursor= (the next_cursor of the previous page)
+    limit = min(max(request.args.get('limit', default_limit, type=int), 0), MAX_PAGE_SIZE)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    after = parse_cursor(request.args.get('cursor', '').strip())
+    return limit, after, offset
+
+@app.route('/api/dashboard')
+def get_dashboard():
+    # Every dashboard section in one (precompressed) response, keyed by the
+    # endpoint that also serves it on its own
+    return snapshot_response('dashboard')
+
+@app.route('/api/manufacturers')
+def get_manufacturers():
+    return snapshot_response('manufacturers')
 
 @app.route('/api/paracetamol')
 def get_paracetamol():
-    if not analyzer:
-        return jsonify({'error': 'Data not loaded'})
-    
-    paracetamol_medicines = analyzer.df[(analyzer.df['short_composition1'].str.contains('Paracetamol', case=False, na=False)) | 
-                                        (analyzer.df['short_composition2'].str.contains('Paracetamol', case=False, na=False))]
-    paracetamol_sorted = paracetamol_medicines[['name', 'manufacturer_name', 'price(₹)']].sort_values('price(₹)').head(20)
-    
-    return jsonify({
-        'medicines': paracetamol_sorted.to_dict('records')
-    })
+    return snapshot_response('paracetamol')
 
 @app.route('/api/price-stats')
 def get_price_stats():
-    if not analyzer:
-        return jsonify({'error': 'Data not loaded'})
+    # ?bins=&scale=linear|log&min=&max= pick other histogram bins
+    snapshot = loaded[1]
+    if not snapshot or not any(arg in request.args for arg in ('bins', 'scale', 'min', 'max')):
+        return snapshot_response('price-stats')
     
-    expensive = analyzer.df.nlargest(10, 'price(₹)')[['name', 'manufacturer_name', 'price(₹)']]
-    cheapest = analyzer.df.nsmallest(10, 'price(₹)')[['name', 'manufacturer_name', 'price(₹)']]
-    
-    return jsonify({
-        'expensive': expensive.to_dict('records'),
-        'cheapest': cheapest.to_dict('records'),
-        'price_distribution': analyzer.df['price(₹)'].dropna().tolist()
-    })
+    try:
+        params = snapshot.price_histogram.resolve(
+            bins=request.args.get('bins'),
+            scale=request.args.get('scale', 'linear').strip(),
+            low=request.args.get('min'),
+            high=request.args.get('max')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)})
+    return snapshot_response('price-stats', snapshot.price_stats_payload(*params), snapshot)
 
 @app.route('/api/diabetes')
 def get_diabetes():
-    if not analyzer:
-        return jsonify({'error': 'Data not loaded'})
-    
-    diabetes_medicines = analyzer.df[(analyzer.df['short_composition1'].str.contains('Glimepiride|Metformin|Insulin|Sitagliptin', case=False, na=False)) |
-                                     (analyzer.df['short_composition2'].str.contains('Glimepiride|Metformin|Insulin|Sitagliptin', case=False, na=False))]
-    
-    return jsonify({
-        'medicines': diabetes_medicines[['name', 'manufacturer_name', 'short_composition1']].head(20).to_dict('records')
-    })
+    return snapshot_response('diabetes')
 
 @app.route('/api/compositions')
 def get_compositions():
-    if not analyzer:
-        return jsonify({'error': 'Data not loaded'})
-    
-    all_compositions = []
-    for comp in analyzer.df['short_composition1'].dropna():
-        all_compositions.append(str(comp).strip())
-    for comp in analyzer.df['short_composition2'].dropna():
-        if str(comp) != 'nan':
-            all_compositions.append(str(comp).strip())
-    
-    composition_counts = pd.Series(all_compositions).value_counts().head(15)
-    
-    return jsonify({
-        'labels': composition_counts.index.tolist(),
-        'data': composition_counts.values.tolist()
-    })
+    return snapshot_response('compositions')
 
 @app.route('/api/summary')
 def get_summary():
-    if not analyzer:
-        return jsonify({'error': 'Data not loaded'})
-    
-    return jsonify({
-        'total_medicines': len(analyzer.df),
-        'total_manufacturers': analyzer.df['manufacturer_name'].nunique(),
-        'avg_price': round(analyzer.df['price(₹)'].mean(), 2),
-        'min_price': analyzer.df['price(₹)'].min(),
-        'max_price': analyzer.df['price(₹)'].max(),
-        'unique_compositions': analyzer.df['short_composition1'].nunique()
-    })
+    return snapshot_response('summary')
 
 @app.route('/api/search')
 def search_medicines():
+    analyzer = loaded[0]
     if not analyzer:
         return jsonify({'error': 'Data not loaded'})
     
@@ -123,30 +367,39 @@ def search_medicines():
     if len(query) < 1:
         return jsonify({'medicines': []})
     
-    # Search for medicines that start with the query (case-insensitive)
-    mask = analyzer.df['name'].str.lower().str.startswith(query.lower(), na=False)
-    results = analyzer.df[mask].head(50)
-    
-    medicines = []
-    for _, row in results.iterrows():
-        comp = f"{row['short_composition1']}"
-        if pd.notna(row['short_composition2']) and str(row['short_composition2']) != 'nan':
-            comp += f" + {row['short_composition2']}"
-        
-        medicines.append({
-            'name': row['name'],
-            'manufacturer': row['manufacturer_name'],
-            'composition': comp,
-            'price': row['price(₹)'],
-            'pack_size': row['pack_size_label'],
-            'type': row['type'],
-            'discontinued': row['Is_discontinued']
+    limit, after, offset = page_args(50)
+    if after is None:
+        return jsonify({'error': 'Invalid cursor'})
+    
+    if request.args.get('fuzzy') == '1':
+        # Medicines of the closest names, salts and manufacturers, best match
+        # first; ranked rather than in dataset order, so paged by offset only
+        with stage('lookup'):
+            rows, matches = analyzer.fuzzy_rows(query)
+            page = rows[offset:offset + limit]
+        with stage('serialize'):
+            return json_response({
+                'medicines': analyzer.records.array(page),
+                'total_count': len(rows),
+                'next_cursor': None,
+                'matches': [{'field': field, 'text': text, 'score': score} for field, _, text, score in matches]
+            })
+    
+    # Medicines that start with the query (case-insensitive), in dataset order
+    with stage('lookup'):
+        rows = analyzer.search_index.name_matches(query)
+        page, has_more = page_rows(rows, limit, after, offset)
+    
+    with stage('serialize'):
+        return json_response({
+            'medicines': analyzer.records.array(page),
+            'total_count': len(rows),
+            'next_cursor': next_cursor(page, has_more)
         })
-    
-    return jsonify({'medicines': medicines})
 
 @app.route('/api/suggestions')
 def get_suggestions():
+    analyzer = loaded[0]
     if not analyzer:
         return jsonify({'suggestions': []})
     
@@ -154,29 +407,27 @@ def get_suggestions():
     if len(query) < 2:
         return jsonify({'suggestions': []})
     
-    # Get medicine name suggestions
-    medicine_suggestions = analyzer.df[analyzer.df['name'].str.contains(query, case=False, na=False)]['name'].unique()[:10]
-    
-    # Get manufacturer suggestions
-    manufacturer_suggestions = analyzer.df[analyzer.df['manufacturer_name'].str.contains(query, case=False, na=False)]['manufacturer_name'].unique()[:5]
-    
-    # Get composition suggestions
-    comp1_suggestions = analyzer.df[analyzer.df['short_composition1'].str.contains(query, case=False, na=False)]['short_composition1'].unique()[:5]
-    
-    suggestions = list(medicine_suggestions) + list(manufacturer_suggestions) + list(comp1_suggestions)
-    
-    return jsonify({'suggestions': suggestions[:15]})
+    with stage('lookup'):
+        if request.args.get('fuzzy') == '1':
+            # Closest names, then manufacturers, then salts, allowing for typos
+            suggestions = analyzer.fuzzy_index.suggestions(query)
+        else:
+            # Medicine names, then manufacturers, then compositions containing the query
+            suggestions = analyzer.search_index.suggestions(query)
+    return jsonify({'suggestions': suggestions})
 
 @app.route('/api/companies')
 def get_companies():
+    analyzer = loaded[0]
     if not analyzer:
         return jsonify({'error': 'Data not loaded'})
     
-    companies = sorted(analyzer.df['manufacturer_name'].unique())
-    return jsonify({'companies': companies})
+    # Sorted once per load
+    return snapshot_response('companies')
 
 @app.route('/api/filter-by-company')
 def filter_by_company():
+    analyzer = loaded[0]
     if not analyzer:
         return jsonify({'error': 'Data not loaded'})
     
@@ -184,33 +435,131 @@ def filter_by_company():
     if not company:
         return jsonify({'medicines': []})
     
+    limit, after, offset = page_args(100)
+    if after is None:
+        return jsonify({'error': 'Invalid cursor'})
+    
     # Filter medicines by company
-    company_medicines = analyzer.df[analyzer.df['manufacturer_name'] == company]
+    with stage('lookup'):
+        company_rows = analyzer.manufacturer_index.rows_for(company)
+        page, has_more = page_rows(company_rows, limit, after, offset, is_sorted=True)
+    
+    with stage('serialize'):
+        return json_response({
+            'medicines': analyzer.records.array(page),
+            'total_count': len(company_rows),
+            'company': company,
+            'next_cursor': next_cursor(page, has_more)
+        })
+
+@app.route('/api/query')
+def query_medicines():
+    analyzer = loaded[0]
+    if not analyzer:
+        return jsonify({'error': 'Data not loaded'})
     
-    medicines = []
-    for _, row in company_medicines.head(100).iterrows():  # Limit to 100 results
-        comp = f"{row['short_composition1']}"
-        if pd.notna(row['short_composition2']) and str(row['short_composition2']) != 'nan':
-            comp += f" + {row['short_composition2']}"
-        
-        medicines.append({
-            'name': row['name'],
-            'manufacturer': row['manufacturer_name'],
-            'composition': comp,
-            'price': row['price(₹)'],
-            'pack_size': row['pack_size_label'],
-            'type': row['type'],
-            'discontinued': row['Is_discontinued']
+    # ?manufacturer=&type=&discontinued= (repeat one to match any of its values),
+    # salts= in the /api/therapeutic syntax, min_price=&max_price=; facets are
+    # combined with AND. sort=price|-price orders by price (paged by offset).
+    filters = {facet: [value.strip() for value in request.args.getlist(facet) if value.strip()] for facet in CATEGORY_FACETS}
+    filters['salts'] = request.args.get('salts', '').strip()
+    filters['price'] = (request.args.get('min_price'), request.args.get('max_price'))
+    facet_limit = min(max(request.args.get('facet_limit', DEFAULT_FACET_LIMIT, type=int), 0), MAX_PAGE_SIZE)
+    sort = request.args.get('sort', '').strip()
+    
+    limit, after, offset = page_args(50)
+    if after is None:
+        return jsonify({'error': 'Invalid cursor'})
+    
+    with stage('lookup'):
+        try:
+            rows, facets = analyzer.facet_index.query(filters, facet_limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)})
+        if sort in ('price', '-price'):
+            page = analyzer.order_rows(rows, sort, offset + limit)[offset:]
+            cursor = None
+        else:
+            page, has_more = page_rows(rows, limit, after, offset, is_sorted=True)
+            cursor = next_cursor(page, has_more)
+    
+    with stage('serialize'):
+        return json_response({
+            'medicines': analyzer.records.array(page),
+            'total_count': len(rows),
+            'next_cursor': cursor,
+            'facets': facets
         })
+
+@app.route('/api/export')
+def export_medicines():
+    analyzer = loaded[0]
+    if not analyzer:
+        return jsonify({'error': 'Data not loaded'})
     
-    return jsonify({
-        'medicines': medicines,
-        'total_count': len(company_medicines),
-        'company': company
-    })
+    company = request.args.get('company', '').strip()
+    query = request.args.get('q', '').strip()
+    export_format = request.args.get('format', 'ndjson').strip()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unknown format: {export_format}', 'formats': sorted(EXPORT_FORMATS)})
+    
+    # Every matching medicine, in dataset order
+    if company:
+        rows = analyzer.manufacturer_index.rows_for(company)
+    elif query:
+        rows = np.sort(analyzer.search_index.name_matches(query))
+    else:
+        return jsonify({'error': 'company or q required'})
+    
+    response = Response(export_chunks(analyzer.records, rows, export_format), mimetype=EXPORT_FORMATS[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename=medicines.{export_format}'
+    return response
+
+@app.route('/api/therapeutic')
+def get_therapeutic():
+    analyzer = loaded[0]
+    if not analyzer:
+        return jsonify({'error': 'Data not loaded'})
+    
+    salt_index = analyzer.salt_index
+    class_name = request.args.get('class', '').strip()
+    salts = request.args.get('salts', '').strip()
+    
+    # Either a registered class or a salt query like 'Paracetamol,Caffeine|Ibuprofen'
+    if class_name:
+        if class_name not in salt_index.classes:
+            return jsonify({'error': f'Unknown class: {class_name}', 'classes': sorted(salt_index.classes)})
+        rows = salt_index.class_rows(class_name)
+        matched_salts = [salt_index.salts[i] for i in salt_index.classes[class_name]]
+    elif salts:
+        with stage('lookup'):
+            rows = salt_index.query(salts)
+        matched_salts = None
+    else:
+        return jsonify({'error': 'class or salts required', 'classes': sorted(salt_index.classes)})
+    
+    limit = min(max(request.args.get('limit', 20, type=int), 0), MAX_PAGE_SIZE)
+    sort = request.args.get('sort', '').strip()
+    with stage('lookup'):
+        selected = analyzer.order_rows(rows, sort, limit)
+    
+    with stage('serialize'):
+        return json_response({
+            'class': class_name or None,
+            'salts': matched_salts,
+            'medicines': analyzer.records.array(selected),
+            'total_count': len(rows)
+        })
+
+def other_rows(rows, excluded, limit):
+    # First `limit` of rows that are not in excluded; only the first
+    # limit + len(excluded) candidates can qualify
+    candidates = rows[:limit + len(excluded)]
+    return candidates[~np.isin(candidates, excluded)][:limit]
 
 @app.route('/api/medicine-details')
 def get_medicine_details():
+    analyzer = loaded[0]
     if not analyzer:
         return jsonify({'error': 'Data not loaded'})
     
@@ -219,40 +568,24 @@ def get_medicine_details():
         return jsonify({'error': 'Medicine name required'})
     
     # Find the medicine
-    medicine = analyzer.df[analyzer.df['name'] == medicine_name].iloc[0] if len(analyzer.df[analyzer.df['name'] == medicine_name]) > 0 else None
-    
-    if medicine is None:
+    name_rows = analyzer.name_index.rows_for(medicine_name)
+    if not len(name_rows):
         return jsonify({'error': 'Medicine not found'})
     
-    # Get similar medicines from same manufacturer
-    similar_medicines = analyzer.df[
-        (analyzer.df['manufacturer_name'] == medicine['manufacturer_name']) & 
-        (analyzer.df['name'] != medicine_name)
-    ].head(5)
-    
-    # Get medicines with similar composition
-    comp_similar = analyzer.df[
-        (analyzer.df['short_composition1'] == medicine['short_composition1']) & 
-        (analyzer.df['name'] != medicine_name)
-    ].head(3)
-    
-    similar_list = []
-    for _, row in similar_medicines.iterrows():
-        similar_list.append({
-            'name': row['name'],
-            'price': row['price(₹)'],
-            'pack_size': row['pack_size_label']
-        })
+    with stage('pandas'):
+        medicine = analyzer.df.iloc[name_rows[0]]
     
-    comp_similar_list = []
-    for _, row in comp_similar.iterrows():
-        comp_similar_list.append({
-            'name': row['name'],
-            'manufacturer': row['manufacturer_name'],
-            'price': row['price(₹)']
-        })
+    with stage('lookup'):
+        # Get similar medicines from same manufacturer
+        similar_rows = other_rows(analyzer.manufacturer_index.rows_for(medicine['manufacturer_name']), name_rows, 5)
+        # Get medicines with similar composition
+        comp_similar_rows = other_rows(analyzer.composition1_index.rows_for(medicine['short_composition1']), name_rows, 3)
     
-    return jsonify({
+    with stage('serialize'):
+        similar_list = analyzer.records.array(similar_rows, SIBLING_FIELDS)
+        comp_similar_list = analyzer.records.array(comp_similar_rows, ALTERNATIVE_FIELDS)
+    
+    return json_response({
         'name': medicine['name'],
         'manufacturer': medicine['manufacturer_name'],
         'composition1': medicine['short_composition1'],
@@ -266,6 +599,84 @@ def get_medicine_details():
         'composition_similar': comp_similar_list
     })
 
+# Most medicines one bulk /api/alternatives request may ask about
+MAX_BULK_NAMES = 100
+
+def alternatives_payload(analyzer, name, limit, offset=0):
+    # Fields of one medicine's alternatives response: every other medicine
+    # with the same salts and strengths, cheapest first
+    name_rows = analyzer.name_index.rows_for(name)
+    if not len(name_rows):
+        return {'name': name, 'error': 'Medicine not found'}
+    
+    row = name_rows[0]
+    with stage('lookup'):
+        group = analyzer.alternative_index.group_rows(row)
+        group = group[~np.isin(group, name_rows)]
+        page = group[offset:offset + limit]
+        prices = analyzer.df['price(₹)'].to_numpy()
+        savings = savings_percent(prices[row], prices[page])
+    
+    with stage('serialize'):
+        manufacturer, composition, price = analyzer.records.values([row], ('manufacturer', 'composition', 'price'))[0]
+        return {
+            'name': name,
+            'manufacturer': manufacturer,
+            'composition': composition,
+            'price': price,
+            'alternatives': analyzer.records.array(page, SUBSTITUTE_FIELDS, {'savings_percent': savings}),
+            'total_count': len(group)
+        }
+
+@app.route('/api/alternatives', methods=['GET', 'POST'])
+def get_alternatives():
+    analyzer = loaded[0]
+    if not analyzer:
+        return jsonify({'error': 'Data not loaded'})
+    
+    limit, _, offset = page_args(MAX_PAGE_SIZE)
+    if request.method == 'GET':
+        name = request.args.get('name', '').strip()
+        if not name:
+            return jsonify({'error': 'Medicine name required'})
+        payload = alternatives_payload(analyzer, name, limit, offset)
+        if 'error' in payload:
+            return jsonify({'error': payload['error']})
+        return json_response(payload)
+    
+    # Bulk: {"names": [...], "limit": n} -> one result per name, in order
+    body = request.get_json(silent=True)
+    names = body.get('names') if isinstance(body, dict) else None
+    if not isinstance(names, list) or not names:
+        return jsonify({'error': 'Medicine names required'})
+    if len(names) > MAX_BULK_NAMES:
+        return jsonify({'error': f'At most {MAX_BULK_NAMES} medicines per request'})
+    limit = body.get('limit', 10)
+    if not isinstance(limit, int) or limit < 0:
+        return jsonify({'error': 'Invalid limit'})
+    
+    limit = min(limit, MAX_PAGE_SIZE)
+    results = [json_object(alternatives_payload(analyzer, str(name).strip(), limit)) for name in names]
+    return json_response({'results': b'[' + b','.join(results) + b']'})
+
+@app.route('/metrics')
+def get_metrics():
+    return Response(registry.render(), content_type=CONTENT_TYPE)
+
+@app.route('/metrics/profile')
+def get_profile():
+    # Sampled stacks of one route in collapsed format, for flamegraph.pl or
+    # speedscope; ?reset=1 starts a new profile after this one
+    if not sampler:
+        return jsonify({'error': 'Profiling is off; set PHARMAVISION_PROFILE_ROUTES'})
+    route = request.args.get('route', '').strip()
+    if not route:
+        return jsonify({'error': 'route required', 'routes': PROFILE_ROUTES})
+    
+    response = Response(sampler.folded(route, reset=request.args.get('reset') == '1'), mimetype='text/plain')
+    response.headers['Content-Disposition'] = f"attachment; filename={route.strip('/').replace('/', '_') or 'index'}.folded"
+    return response
+
 if __name__ == '__main__':
     # Load data on startup
     if load_data():
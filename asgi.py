@@ -0,0 +1,127 @@
+# ASGI entry point: the Flask app behind an event loop, so a slow client only
+# holds a pending write instead of a whole worker.
+#
+#   uvicorn asgi:app --workers 4
+#   gunicorn asgi:app -k uvicorn.workers.UvicornWorker   (gunicorn.conf.py still applies)
+#
+# Each request's WSGI call runs on a thread pool (PHARMAVISION_ASGI_THREADS,
+# default 8). The response body is generated there too, a chunk at a time,
+# but sent to the client from the event loop, so the thread is free again as
+# soon as the last chunk is handed over.
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import app as web
+
+ASGI_THREADS = int(os.environ.get('PHARMAVISION_ASGI_THREADS', '8'))
+
+executor = ThreadPoolExecutor(max_workers=ASGI_THREADS, thread_name_prefix='wsgi')
+
+
+def wsgi_environ(scope, body):
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': scope['client'][0] if scope.get('client') else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if name == 'CONTENT_TYPE':
+            environ[name] = value
+            continue
+        if name == 'CONTENT_LENGTH':
+            continue
+        key = f'HTTP_{name}'
+        if key in environ:
+            # Repeated headers are joined with commas, except cookies (RFC 6265)
+            value = f"{environ[key]}{'; ' if key == 'HTTP_COOKIE' else ','}{value}"
+        environ[key] = value
+    # The body has been read in full, so its length is known even when chunked
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def start_wsgi(environ):
+    # Call the app and fetch the first chunk, which is when a streamed
+    # response is certain to have called start_response
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started['status'] = int(status.split(' ', 1)[0])
+        started['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+
+    body = web.app(environ, start_response)
+    chunks = iter(body)
+    first = next(chunks, None)
+    return started, body, chunks, first
+
+
+def close_body(body):
+    if hasattr(body, 'close'):
+        body.close()
+
+
+async def http(scope, receive, send):
+    body = await read_body(receive)
+    if body is None:
+        return
+    loop = asyncio.get_running_loop()
+    started, response_body, chunks, chunk = await loop.run_in_executor(executor, start_wsgi, wsgi_environ(scope, body))
+    try:
+        await send({'type': 'http.response.start', 'status': started['status'], 'headers': started['headers']})
+        while chunk is not None:
+            if chunk:
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            chunk = await loop.run_in_executor(executor, next, chunks, None)
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    finally:
+        await loop.run_in_executor(executor, close_body, response_body)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            # Under gunicorn the data is already loaded (preloaded or post_worker_init)
+            if web.analyzer is None:
+                await asyncio.get_running_loop().run_in_executor(executor, web.load_data)
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await lifespan(receive, send)
+    elif scope['type'] == 'http':
+        await http(scope, receive, send)
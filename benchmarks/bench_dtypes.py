@@ -0,0 +1,57 @@
+# Memory and speed of the compact (categorical / downcast) frame vs. read_csv's default dtypes.
+#
+#   python benchmarks/bench_dtypes.py [path/to/A_Z_medicines_dataset_of_India.csv]
+import os
+import sys
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from compact_frame import compact_dtypes, memory_report, value_counts
+
+OPERATIONS = {
+    'value_counts(manufacturer)': lambda df: value_counts(df['manufacturer_name']).head(15),
+    'nunique(manufacturer)': lambda df: df['manufacturer_name'].nunique(),
+    'nunique(composition1)': lambda df: df['short_composition1'].nunique(),
+    'groupby(manufacturer).price.mean': lambda df: df.groupby('manufacturer_name', observed=True)['price(₹)'].mean(),
+    'groupby(type).size': lambda df: df.groupby('type', observed=True).size(),
+    'manufacturer == "Cipla Ltd"': lambda df: (df['manufacturer_name'] == 'Cipla Ltd').sum(),
+}
+
+
+def best_of(func, df, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, 'A_Z_medicines_dataset_of_India.csv')
+    default = pd.read_csv(csv_path)
+    compact = compact_dtypes(default)
+
+    before = memory_report(default)
+    after = memory_report(compact)
+    print(f"Rows: {before['rows']}\n")
+    print(f"{'Column':<22} {'default':>18} {'compact':>22}")
+    print("-" * 64)
+    for column in default.columns:
+        old, new = before['columns'][column], after['columns'][column]
+        print(f"{column:<22} {old['dtype']:>8} {old['bytes'] / 1e6:>7.1f}MB {new['dtype']:>12} {new['bytes'] / 1e6:>7.1f}MB")
+    print(f"{'total':<22} {before['total_bytes'] / 1e6:>17.1f}MB {after['total_bytes'] / 1e6:>21.1f}MB\n")
+
+    print(f"{'Operation':<36} {'default':>10} {'compact':>10}")
+    print("-" * 58)
+    for label, func in OPERATIONS.items():
+        assert str(func(default)) == str(func(compact)), f"{label} differs"
+        print(f"{label:<36} {best_of(func, default) * 1000:>8.2f}ms {best_of(func, compact) * 1000:>8.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Latency of the fuzzy (typo-tolerant) search behind ?fuzzy=1: queries are real
+# names, salts and manufacturers with one or two random typos, plus prefixes of
+# them as typed into the search box. Reports p50/p99 of the index lookup and of
+# the whole /api/search and /api/suggestions requests, and how often the value a
+# typo was made from comes back among the matches.
+#
+#   python benchmarks/bench_fuzzy.py [path/to/A_Z_medicines_dataset_of_India.csv]
+import os
+import random
+import string
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+
+import app as web
+from medicine_analysis import MedicineAnalyzer
+
+QUERIES = 2000
+
+
+def typo(word, rng):
+    # One random deletion, insertion, substitution or transposition
+    i = rng.randrange(len(word))
+    kind = rng.choice('disx' if len(word) > 1 else 'is')
+    if kind == 'd':
+        return word[:i] + word[i + 1:]
+    if kind == 'i':
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if kind == 's':
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    i = min(i, len(word) - 2)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def make_queries(analyzer, count, seed=42):
+    rng = random.Random(seed)
+    pools = {field: index.values.tolist() for field, index in analyzer.fuzzy_index.indexes.items()}
+    queries = []
+    for _ in range(count):
+        field = rng.choice(list(pools))
+        value = rng.choice(pools[field])
+        words = value.lower().split()[:2]
+        # Typos only in words long enough to be allowed any
+        words = [typo(word, rng) if len(word) >= 6 else word for word in words]
+        query = ' '.join(words)
+        if rng.random() < 0.3:
+            query = query[:max(3, len(query) * 2 // 3)]
+        queries.append((field, value, query))
+    return queries
+
+
+def percentiles(timings):
+    return np.percentile(np.asarray(timings) * 1000, [50, 99])
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, 'A_Z_medicines_dataset_of_India.csv')
+    analyzer = MedicineAnalyzer(csv_path)
+    web.install_analyzer(analyzer)
+    client = web.app.test_client()
+    queries = make_queries(analyzer, QUERIES)
+    print(f"Rows: {len(analyzer.df)}, fuzzy vocabulary: " +
+          ", ".join(f"{field} {len(index.words)} words" for field, index in analyzer.fuzzy_index.indexes.items()))
+
+    lookup = []
+    found = 0
+    for field, value, query in queries:
+        start = time.perf_counter()
+        matches = analyzer.fuzzy_index.matches(query)
+        lookup.append(time.perf_counter() - start)
+        found += any(match[0] == field and match[2] == value for match in matches)
+
+    timings = {'matches()': lookup, '/api/search': [], '/api/suggestions': []}
+    for _, _, query in queries:
+        for route in ('/api/search', '/api/suggestions'):
+            start = time.perf_counter()
+            client.get(route, query_string={'q': query, 'fuzzy': '1'})
+            timings[route].append(time.perf_counter() - start)
+
+    print(f"Queries: {len(queries)}, source value among the matches: {found / len(queries):.1%}\n")
+    print(f"{'Lookup':<18} {'p50':>9} {'p99':>9}")
+    print("-" * 38)
+    for name, values in timings.items():
+        p50, p99 = percentiles(values)
+        print(f"{name:<18} {p50:>7.2f}ms {p99:>7.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# Per-request latency of /api/medicine-details and /api/filter-by-company with the
+# hash indexes vs. the full-column equality scans they replaced. The old handlers
+# are mounted next to the real ones so both go through the same Flask stack.
+#
+#   python benchmarks/bench_lookups.py [path/to/A_Z_medicines_dataset_of_India.csv]
+import os
+import random
+import statistics
+import sys
+import time
+from urllib.parse import quote
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import matplotlib
+matplotlib.use('Agg')
+
+import app as web
+import pandas as pd
+from flask import jsonify, request
+from medicine_analysis import MedicineAnalyzer
+
+
+def iterrows_records(medicines):
+    records = []
+    for _, row in medicines.iterrows():
+        comp = f"{row['short_composition1']}"
+        if pd.notna(row['short_composition2']) and str(row['short_composition2']) != 'nan':
+            comp += f" + {row['short_composition2']}"
+        records.append({
+            'name': row['name'],
+            'manufacturer': row['manufacturer_name'],
+            'composition': comp,
+            'price': row['price(₹)'],
+            'pack_size': row['pack_size_label'],
+            'type': row['type'],
+            'discontinued': row['Is_discontinued']
+        })
+    return records
+
+
+def scan_filter_by_company():
+    df = web.analyzer.df
+    company = request.args.get('company', '').strip()
+    company_medicines = df[df['manufacturer_name'] == company]
+    return jsonify({
+        'medicines': iterrows_records(company_medicines.head(100)),
+        'total_count': len(company_medicines),
+        'company': company
+    })
+
+
+def scan_medicine_details():
+    df = web.analyzer.df
+    medicine_name = request.args.get('name', '').strip()
+    medicine = df[df['name'] == medicine_name].iloc[0] if len(df[df['name'] == medicine_name]) > 0 else None
+    if medicine is None:
+        return jsonify({'error': 'Medicine not found'})
+    similar = df[(df['manufacturer_name'] == medicine['manufacturer_name']) & (df['name'] != medicine_name)].head(5)
+    comp_similar = df[(df['short_composition1'] == medicine['short_composition1']) & (df['name'] != medicine_name)].head(3)
+    return jsonify({
+        'name': medicine['name'],
+        'similar_medicines': [{'name': row['name'], 'price': row['price(₹)'], 'pack_size': row['pack_size_label']}
+                              for _, row in similar.iterrows()],
+        'composition_similar': [{'name': row['name'], 'manufacturer': row['manufacturer_name'], 'price': row['price(₹)']}
+                                for _, row in comp_similar.iterrows()]
+    })
+
+
+def latencies(client, urls):
+    timings = []
+    for url in urls:
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return timings
+
+
+def report(label, timings):
+    timings = sorted(timings)
+    p50 = statistics.median(timings) * 1000
+    p99 = timings[int(len(timings) * 0.99) - 1] * 1000
+    print(f"{label:<34} {p50:>9.2f}ms {p99:>9.2f}ms")
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, 'A_Z_medicines_dataset_of_India.csv')
+    web.install_analyzer(MedicineAnalyzer(csv_path))
+    web.app.add_url_rule('/bench/scan-filter-by-company', view_func=scan_filter_by_company)
+    web.app.add_url_rule('/bench/scan-medicine-details', view_func=scan_medicine_details)
+    client = web.app.test_client()
+
+    rng = random.Random(42)
+    df = web.analyzer.df
+    names = rng.sample(df['name'].dropna().tolist(), 200)
+    companies = rng.sample(sorted(df['manufacturer_name'].dropna().unique()), min(100, df['manufacturer_name'].nunique()))
+
+    print(f"Rows: {len(df)}\n")
+    print(f"{'Route':<34} {'p50':>11} {'p99':>11}")
+    print("-" * 58)
+    report('medicine-details (scan)', latencies(client, [f'/bench/scan-medicine-details?name={quote(n)}' for n in names]))
+    report('medicine-details (index)', latencies(client, [f'/api/medicine-details?name={quote(n)}' for n in names]))
+    report('filter-by-company (scan)', latencies(client, [f'/bench/scan-filter-by-company?company={quote(c)}' for c in companies]))
+    report('filter-by-company (index)', latencies(client, [f'/api/filter-by-company?company={quote(c)}' for c in companies]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Compare the prebuilt search indexes against the pandas column scans they replaced.
+#
+#   python benchmarks/bench_search.py [path/to/A_Z_medicines_dataset_of_India.csv]
+import os
+import sys
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from search_index import SearchIndex
+
+QUERIES = ['a', 'pa', 'par', 'para', 'Dolo', 'aug', 'cip', 'amlo', 'metformin', 'ltd', 'mg', 'zz', 'injection']
+
+
+def scan_search(df, query):
+    mask = df['name'].str.lower().str.startswith(query.lower(), na=False)
+    return df[mask].head(50).index.tolist()
+
+
+def scan_suggestions(df, query):
+    names = df[df['name'].str.contains(query, case=False, na=False)]['name'].unique()[:10]
+    manufacturers = df[df['manufacturer_name'].str.contains(query, case=False, na=False)]['manufacturer_name'].unique()[:5]
+    comps = df[df['short_composition1'].str.contains(query, case=False, na=False)]['short_composition1'].unique()[:5]
+    return (list(names) + list(manufacturers) + list(comps))[:15]
+
+
+def best_of(func, *args, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, 'A_Z_medicines_dataset_of_India.csv')
+    df = pd.read_csv(csv_path)
+    print(f"Rows: {len(df)}")
+
+    start = time.perf_counter()
+    index = SearchIndex(df)
+    print(f"Index build: {time.perf_counter() - start:.2f}s\n")
+
+    print(f"{'Query':<12} {'search scan':>12} {'search idx':>12} {'suggest scan':>13} {'suggest idx':>12}")
+    print("-" * 65)
+    for query in QUERIES:
+        scan_time, expected = best_of(scan_search, df, query)
+        index_time, ids = best_of(index.search_names, query)
+        assert ids.tolist() == expected, f"search mismatch for {query!r}"
+
+        sugg_scan_time, expected = best_of(scan_suggestions, df, query)
+        sugg_index_time, found = best_of(index.suggestions, query)
+        assert found == expected, f"suggestions mismatch for {query!r}"
+
+        print(f"{query:<12} {scan_time * 1000:>10.2f}ms {index_time * 1000:>10.3f}ms "
+              f"{sugg_scan_time * 1000:>11.2f}ms {sugg_index_time * 1000:>10.3f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+# Serialization cost of the medicine lists /api/search, /api/filter-by-company and
+# /api/therapeutic return: the old iterrows() + jsonify() path vs. the record store's
+# pre-encoded fragments. Both must produce the same bytes.
+#
+#   python benchmarks/bench_serialization.py [path/to/A_Z_medicines_dataset_of_India.csv]
+import os
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+
+import app as web
+from bench_lookups import iterrows_records
+from medicine_analysis import MedicineAnalyzer
+
+
+def timed(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func()
+        timings.append(time.perf_counter() - start)
+    return body, statistics.median(timings) * 1000
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, 'A_Z_medicines_dataset_of_India.csv')
+    web.install_analyzer(MedicineAnalyzer(csv_path))
+    analyzer = web.analyzer
+    rng = np.random.default_rng(42)
+
+    print(f"Rows: {len(analyzer.df)}\n")
+    print(f"{'Records':>8} {'iterrows':>11} {'store':>11} {'speedup':>8}")
+    print("-" * 41)
+    with web.app.app_context():
+        for size in (10, 50, 100, 1000):
+            rows = np.sort(rng.choice(len(analyzer.df), size=min(size, len(analyzer.df)), replace=False))
+            old, old_ms = timed(lambda: web.jsonify({'medicines': iterrows_records(analyzer.df.iloc[rows])}).get_data(), 20)
+            new, new_ms = timed(lambda: web.json_response({'medicines': analyzer.records.array(rows)}).get_data(), 20)
+            assert old == new, f"output differs for {size} records"
+            print(f"{size:>8} {old_ms:>9.2f}ms {new_ms:>9.2f}ms {old_ms / new_ms:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+# Time dataset loading: plain CSV parse vs. building and reading the columnar cache.
+#
+#   python benchmarks/bench_startup.py [path/to/A_Z_medicines_dataset_of_India.csv]
+import os
+import shutil
+import sys
+import time
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from dataset_cache import load_dataset
+
+
+def timed(func, *args, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, 'A_Z_medicines_dataset_of_India.csv')
+    cache_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup.cache')
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+    try:
+        csv_time, expected = timed(pd.read_csv, csv_path)
+
+        start = time.perf_counter()
+        load_dataset(csv_path, cache_dir)
+        build_time = time.perf_counter() - start
+
+        cache_time, df = timed(load_dataset, csv_path, cache_dir)
+        pd.testing.assert_frame_equal(df, expected)
+
+        cache_size = sum(os.path.getsize(os.path.join(cache_dir, f)) for f in os.listdir(cache_dir))
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"Rows: {len(expected)}")
+    print(f"CSV size: {os.path.getsize(csv_path) / 1e6:.1f} MB, cache size: {cache_size / 1e6:.1f} MB")
+    print("-" * 50)
+    print(f"{'pd.read_csv':<30} {csv_time * 1000:>10.1f}ms")
+    print(f"{'first start (parse + write)':<30} {build_time * 1000:>10.1f}ms")
+    print(f"{'cached start':<30} {cache_time * 1000:>10.1f}ms")
+    print(f"Speedup: {csv_time / cache_time:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+# End-to-end benchmark of the analyzer and the API on synthetic datasets (see
+# synthetic_dataset.py) or a real CSV, written to JSON so runs from different
+# commits can be compared:
+#   - each load stage timed on its own: CSV parse, columnar cache build and
+#     read, dtype compaction and the index build;
+#   - each console analysis method (charts off);
+#   - every Flask route through the test client, one request at a time, both
+#     uncompressed and with --accept-encoding (latency, time to first byte and
+#     bytes sent);
+#   - a mixed workload from several threads at once (throughput, p50/p99).
+#
+#   python benchmarks/bench_suite.py [--sizes 10k,250k,2m] [--csv path] [--requests 200]
+#                                    [--threads 8] [--accept-encoding 'br, gzip']
+#                                    [--output results.json] [--compare old.json]
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+
+import app as web
+from compact_frame import CATEGORICAL_COLUMNS, compact_dtypes
+from dataset_cache import default_cache_dir, load_dataset
+from medicine_analysis import MedicineAnalyzer
+from synthetic_dataset import dataset_path
+
+ANALYSIS_METHODS = {
+    'manufacturer_analysis': lambda analyzer: analyzer.manufacturer_analysis(charts=False),
+    'price_analysis': lambda analyzer: analyzer.price_analysis(charts=False),
+    'therapeutic_analysis': lambda analyzer: analyzer.therapeutic_analysis(),
+    'chemical_analysis': lambda analyzer: analyzer.chemical_analysis(charts=False),
+    'generate_summary': lambda analyzer: analyzer.generate_summary(),
+}
+
+# A change is flagged by --compare when it is this much slower
+REGRESSION_RATIO = 1.2
+
+
+class Samples:
+    # Real values of the loaded dataset to build requests from
+    def __init__(self, analyzer, seed):
+        df = analyzer.df
+        self.rng = random.Random(seed)
+        self.names = df['name'].dropna().astype(str).sample(min(500, len(df)), random_state=seed).tolist()
+        self.manufacturers = df['manufacturer_name'].dropna().astype(str).sample(min(500, len(df)), random_state=seed).tolist()
+        self.salts = list(analyzer.composition_engine.salts)
+        self.lock = threading.Lock()
+
+    def pick(self, values):
+        with self.lock:
+            return self.rng.choice(values)
+
+    def prefix(self):
+        name = self.pick(self.names)
+        return name[:self.pick([1, 2, 3, 4, 6])]
+
+    def typo(self):
+        name = self.pick(self.names).split()[0]
+        i = self.pick(range(len(name)))
+        return name[:i] + name[i + 1:] if len(name) > 4 else name
+
+
+# Route rule -> request (method, path, query string or JSON body). Every route of
+# the app needs an entry; routes without one are listed as not benchmarked.
+ROUTES = {
+    '/': lambda s: ('GET', '/', None),
+    '/api/dashboard': lambda s: ('GET', '/api/dashboard', None),
+    '/api/manufacturers': lambda s: ('GET', '/api/manufacturers', None),
+    '/api/paracetamol': lambda s: ('GET', '/api/paracetamol', None),
+    '/api/price-stats': lambda s: ('GET', '/api/price-stats', s.pick([None, {'bins': 50, 'scale': 'log'}])),
+    '/api/diabetes': lambda s: ('GET', '/api/diabetes', None),
+    '/api/compositions': lambda s: ('GET', '/api/compositions', None),
+    '/api/summary': lambda s: ('GET', '/api/summary', None),
+    '/api/search': lambda s: ('GET', '/api/search', s.pick([{'q': s.prefix()}, {'q': s.typo(), 'fuzzy': '1'}])),
+    '/api/suggestions': lambda s: ('GET', '/api/suggestions', {'q': s.prefix() + 'a'}),
+    '/api/companies': lambda s: ('GET', '/api/companies', None),
+    '/api/filter-by-company': lambda s: ('GET', '/api/filter-by-company', {'company': s.pick(s.manufacturers)}),
+    '/api/query': lambda s: ('GET', '/api/query', s.pick([
+        {'manufacturer': s.pick(s.manufacturers)}, {'type': 'allopathy', 'discontinued': 'false', 'max_price': 100},
+        {'salts': s.pick(s.salts), 'min_price': 10, 'max_price': 500, 'sort': 'price'}])),
+    '/api/export': lambda s: ('GET', '/api/export', {'company': s.pick(s.manufacturers), 'format': s.pick(['ndjson', 'csv'])}),
+    '/api/therapeutic': lambda s: ('GET', '/api/therapeutic', s.pick([
+        {'class': 'diabetes', 'limit': 50}, {'salts': ','.join([s.pick(s.salts), s.pick(s.salts)]), 'sort': 'price'}])),
+    '/api/medicine-details': lambda s: ('GET', '/api/medicine-details', {'name': s.pick(s.names)}),
+    '/api/alternatives': lambda s: s.pick([
+        ('GET', '/api/alternatives', {'name': s.pick(s.names), 'limit': 50}),
+        ('POST', '/api/alternatives', {'names': [s.pick(s.names) for _ in range(20)]})]),
+    '/metrics': lambda s: ('GET', '/metrics', None),
+    '/metrics/profile': lambda s: ('GET', '/metrics/profile', {'route': '/api/search'}),
+}
+
+
+def send(client, request, accept_encoding=None):
+    # (status, bytes sent, seconds to the first body byte, seconds in all);
+    # the body is read chunk by chunk, so streamed responses run to the end
+    method, path, params = request
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    start = time.perf_counter()
+    if method == 'POST':
+        response = client.post(path, json=params, headers=headers, buffered=False)
+    else:
+        response = client.get(path, query_string=params, headers=headers, buffered=False)
+    first_byte = None
+    size = 0
+    for chunk in response.response:
+        if chunk and first_byte is None:
+            first_byte = time.perf_counter() - start
+        size += len(chunk)
+    response.close()
+    seconds = time.perf_counter() - start
+    return response.status_code, size, seconds if first_byte is None else first_byte, seconds
+
+
+def latency_summary(timings, seconds=None, first_bytes=None):
+    timings = np.asarray(timings) * 1000
+    summary = {
+        'requests': len(timings),
+        'mean_ms': round(float(timings.mean()), 3),
+        'p50_ms': round(float(np.percentile(timings, 50)), 3),
+        'p99_ms': round(float(np.percentile(timings, 99)), 3),
+    }
+    if first_bytes is not None:
+        first_bytes = np.asarray(first_bytes) * 1000
+        summary['ttfb_p50_ms'] = round(float(np.percentile(first_bytes, 50)), 3)
+        summary['ttfb_p99_ms'] = round(float(np.percentile(first_bytes, 99)), 3)
+    if seconds is not None:
+        summary['seconds'] = round(seconds, 3)
+        summary['throughput_rps'] = round(len(timings) / seconds, 1)
+    return summary
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, round(time.perf_counter() - start, 4)
+
+
+def bench_load(csv_path):
+    # Each load stage on its own: cold CSV parse, columnar cache build and
+    # read, dtype compaction and the index build; the analyzer is built once
+    results = {}
+    _, results['csv_parse_seconds'] = timed(lambda: pd.read_csv(csv_path))
+    shutil.rmtree(default_cache_dir(csv_path), ignore_errors=True)
+    _, results['cache_build_seconds'] = timed(lambda: load_dataset(csv_path, categorical=CATEGORICAL_COLUMNS))
+    df, results['cache_load_seconds'] = timed(lambda: load_dataset(csv_path, categorical=CATEGORICAL_COLUMNS))
+    _, results['compact_dtypes_seconds'] = timed(lambda: compact_dtypes(df))
+    analyzer = MedicineAnalyzer(csv_path)
+    _, results['build_indexes_seconds'] = timed(analyzer.build_indexes)
+    return analyzer, results
+
+
+def bench_methods(analyzer):
+    results = {}
+    for name, method in ANALYSIS_METHODS.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, results[name] = timed(lambda: method(analyzer))
+    return results
+
+
+def bench_route(client, plan, accept_encoding=None):
+    timings = []
+    first_bytes = []
+    statuses = {}
+    sizes = []
+    for request in plan:
+        status, size, first_byte, seconds = send(client, request, accept_encoding)
+        timings.append(seconds)
+        first_bytes.append(first_byte)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        sizes.append(size)
+    return dict(latency_summary(timings, first_bytes=first_bytes), statuses=statuses, mean_bytes=int(np.mean(sizes)))
+
+
+def bench_routes(samples, requests, accept_encoding):
+    # Each route's requests are sent twice, without and with compression
+    client = web.app.test_client()
+    results = {}
+    for rule in sorted(rule.rule for rule in web.app.url_map.iter_rules() if rule.endpoint != 'static'):
+        if rule not in ROUTES:
+            results[rule] = {'skipped': 'no request defined in bench_suite.ROUTES'}
+            continue
+        send(client, ROUTES[rule](samples))
+        plan = [ROUTES[rule](samples) for _ in range(requests)]
+        results[rule] = bench_route(client, plan)
+        if accept_encoding:
+            compressed = bench_route(client, plan, accept_encoding)
+            compressed['bytes_saved_percent'] = round(100 - 100 * compressed['mean_bytes'] / max(results[rule]['mean_bytes'], 1), 1)
+            results[rule]['compressed'] = compressed
+    return results
+
+
+def bench_load_test(samples, threads, requests, accept_encoding):
+    # A mix of every route, requests spread over the threads, each with its own client
+    rules = [rule for rule in ROUTES if rule not in ('/metrics', '/metrics/profile')]
+    plan = [ROUTES[samples.pick(rules)](samples) for _ in range(requests)]
+    batches = [plan[i::threads] for i in range(threads)]
+
+    def worker(batch):
+        client = web.app.test_client()
+        timings = []
+        sent = 0
+        errors = 0
+        for request in batch:
+            status, size, _, request_seconds = send(client, request, accept_encoding)
+            timings.append(request_seconds)
+            sent += size
+            errors += status >= 500
+        return timings, sent, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = list(pool.map(worker, batches))
+    seconds = time.perf_counter() - start
+    timings = [t for batch_timings, _, _ in outcomes for t in batch_timings]
+    sent = sum(size for _, size, _ in outcomes)
+    return dict(latency_summary(timings, seconds), threads=threads, errors=sum(errors for _, _, errors in outcomes),
+                megabytes_per_second=round(sent / seconds / 1e6, 3))
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def run_dataset(csv_path, args):
+    print(f"\n== {csv_path}")
+    analyzer, load = bench_load(csv_path)
+    print(f"Rows: {len(analyzer.df)}  load: " + ", ".join(f"{key} {value:.2f}s" for key, value in load.items()))
+    web.install_analyzer(analyzer)
+    samples = Samples(analyzer, args.seed)
+
+    methods = bench_methods(analyzer)
+    print("Methods: " + ", ".join(f"{name} {seconds:.3f}s" for name, seconds in methods.items()))
+
+    routes = bench_routes(samples, args.requests, args.accept_encoding)
+    print(f"\n{'Route':<26} {'p50':>9} {'p99':>9} {'TTFB p50':>9} {'mean bytes':>11} {'compressed':>11} {'TTFB p50':>9}")
+    print("-" * 91)
+    for rule, result in routes.items():
+        if 'skipped' in result:
+            print(f"{rule:<26} skipped")
+            continue
+        line = f"{rule:<26} {result['p50_ms']:>7.2f}ms {result['p99_ms']:>7.2f}ms {result['ttfb_p50_ms']:>7.2f}ms {result['mean_bytes']:>11}"
+        if 'compressed' in result:
+            compressed = result['compressed']
+            line += f" {compressed['mean_bytes']:>11} {compressed['ttfb_p50_ms']:>7.2f}ms"
+        print(line)
+
+    load_test = bench_load_test(samples, args.threads, args.requests * 10, args.accept_encoding)
+    print(f"\nLoad test ({load_test['threads']} threads, {load_test['requests']} requests): "
+          f"{load_test['throughput_rps']} req/s, p50 {load_test['p50_ms']:.2f}ms, p99 {load_test['p99_ms']:.2f}ms, "
+          f"{load_test['megabytes_per_second']} MB/s sent, {load_test['errors']} errors")
+    return {'csv': csv_path, 'rows': len(analyzer.df), 'load': load, 'methods': methods,
+            'routes': routes, 'load_test': load_test}
+
+
+def flatten(results, prefix=''):
+    # {"a": {"b": 1}} -> {"a.b": 1}, numbers only
+    flat = {}
+    for key, value in results.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+def compare(baseline, current):
+    # Timings (seconds, *_ms) that got more than REGRESSION_RATIO slower
+    old = flatten(baseline['datasets'])
+    new = flatten(current['datasets'])
+    timing_keys = [key for key in new if key in old and (key.endswith('_ms') or key.endswith('seconds') or
+                                                         key.startswith(tuple(f'{d}.methods.' for d in current['datasets'])))]
+    regressions = 0
+    print(f"\nCompared with {baseline['environment'].get('commit')}:")
+    for key in sorted(timing_keys):
+        if old[key] <= 0:
+            continue
+        ratio = new[key] / old[key]
+        if ratio > REGRESSION_RATIO:
+            regressions += 1
+            print(f"  slower {ratio:5.2f}x  {key}: {old[key]} -> {new[key]}")
+    print(f"  {regressions} of {len(timing_keys)} timings slower by more than {REGRESSION_RATIO - 1:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', default='10k', help='synthetic dataset sizes, e.g. 10k,250k,2m')
+    parser.add_argument('--csv', action='append', default=[], help='benchmark this CSV too (repeatable)')
+    parser.add_argument('--requests', type=int, default=200, help='requests per route')
+    parser.add_argument('--threads', type=int, default=8, help='load test threads')
+    parser.add_argument('--accept-encoding', default='br, gzip',
+                        help="Accept-Encoding of the compressed route runs and the load test ('' for none)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline results JSON to compare against')
+    args = parser.parse_args()
+
+    datasets = {}
+    for size in [size.strip() for size in args.sizes.split(',') if size.strip()]:
+        datasets[size] = run_dataset(dataset_path(size, args.seed), args)
+    for csv_path in args.csv:
+        datasets[os.path.basename(csv_path)] = run_dataset(os.path.abspath(csv_path), args)
+
+    results = {'environment': environment(), 'datasets': datasets}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# Synthetic datasets with the schema of A_Z_medicines_dataset_of_India.csv, so the
+# benchmarks run offline and at sizes the real file does not come in. Values are
+# drawn to look like the real data: brand names from a shared pool (so some
+# repeat), a long tail of manufacturers behind a few big ones, compositions as
+# "Salt (strength) " with an optional second one, and a few missing prices.
+#
+#   python benchmarks/synthetic_dataset.py 250k [out.csv] [seed]
+#
+# Sizes: 10k, 250k, 2m (or any row count). The default output is
+# benchmarks/data/synthetic_<size>_<seed>.csv.
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(BENCH_DIR, 'data')
+
+SIZES = {'10k': 10_000, '250k': 250_000, '2m': 2_000_000}
+
+COLUMNS = ['id', 'name', 'price(₹)', 'Is_discontinued', 'manufacturer_name', 'type',
+           'pack_size_label', 'short_composition1', 'short_composition2']
+
+SALTS = [
+    'Paracetamol', 'Amoxycillin', 'Clavulanic Acid', 'Amlodipine', 'Atenolol', 'Losartan', 'Telmisartan',
+    'Metformin', 'Glimepiride', 'Insulin Glargine', 'Sitagliptin', 'Diclofenac', 'Cetirizine', 'Azithromycin',
+    'Pantoprazole', 'Domperidone', 'Ofloxacin', 'Ornidazole', 'Ibuprofen', 'Aceclofenac', 'Montelukast',
+    'Levocetirizine', 'Ambroxol', 'Vitamin D3', 'Cefixime', 'Rabeprazole', 'Ondansetron', 'Atorvastatin',
+    'Rosuvastatin', 'Clopidogrel', 'Ciprofloxacin', 'Levofloxacin', 'Cefpodoxime', 'Esomeprazole', 'Tramadol',
+    'Methylcobalamin', 'Folic Acid', 'Calcium Carbonate', 'Voglibose', 'Teneligliptin', 'Olmesartan',
+    'Hydrochlorothiazide', 'Chlorpheniramine', 'Phenylephrine', 'Dextromethorphan', 'Guaifenesin',
+    'Mupirocin', 'Clotrimazole', 'Betamethasone', 'Fluconazole'
+]
+STRENGTHS = ['500mg', '250mg', '125mg', '5mg', '10mg', '20mg', '40mg', '650mg', '1mg', '2mg', '100IU',
+             '50mg', '0.5% w/v', '1% w/w', '100mg', '200mg', '60000IU', '2.5mg']
+MAJOR_MANUFACTURERS = [
+    'Sun Pharmaceutical Industries Ltd', 'Intas Pharmaceuticals Ltd', 'Cipla Ltd', 'Torrent Pharmaceuticals Ltd',
+    'Lupin Ltd', 'Mankind Pharma Ltd', 'Alkem Laboratories Ltd', 'Zydus Cadila', 'Abbott',
+    "Dr Reddy's Laboratories Ltd", 'Glenmark Pharmaceuticals Ltd', 'Micro Labs Ltd', 'Macleods Pharmaceuticals Pvt Ltd'
+]
+FORMS = ['Tablet', 'Capsule', 'Syrup', 'Injection', 'Cream', 'Drop', 'Suspension', 'Gel', 'Ointment']
+SUFFIXES = ['', '', '', 'Plus', 'Forte', 'DS', 'MR', 'SR', '500', '650', 'XL']
+PACKS = ['strip of 10 tablets', 'strip of 15 tablets', 'strip of 10 capsules', 'bottle of 60 ml Syrup',
+         'bottle of 100 ml Syrup', 'vial of 1 ml Injection', 'tube of 30 gm Cream', 'bottle of 10 ml Drops',
+         'packet of 1 gm Powder']
+SYLLABLES = ['ba', 'co', 'de', 'fi', 'go', 'lu', 'ma', 'ne', 'pi', 'ro', 'sa', 'ti', 'vo', 'xa', 'ze', 'qu',
+             'ar', 'el', 'on', 'um', 'ka', 'zi', 'ny', 'lo', 'mox', 'cef', 'pan', 'dol', 'met', 'tel']
+
+
+def size_rows(size):
+    if str(size).lower() in SIZES:
+        return SIZES[str(size).lower()]
+    return int(size)
+
+
+def zipf_choice(rng, count, rows, skew=1.1):
+    # Indexes into a list of count items, the first ones far more common
+    weights = 1.0 / np.arange(1, count + 1) ** skew
+    return rng.choice(count, size=rows, p=weights / weights.sum())
+
+
+def brand_names(rng, count):
+    lengths = rng.integers(2, 5, size=count)
+    picks = rng.integers(0, len(SYLLABLES), size=(count, 4))
+    return [''.join(SYLLABLES[i] for i in row[:length]).capitalize() for row, length in zip(picks.tolist(), lengths.tolist())]
+
+
+def compositions(rng, rows, second=False):
+    # First compositions end with a space and second ones start with one, as in the CSV
+    template = ' {} ({})' if second else '{} ({}) '
+    choices = np.asarray([template.format(salt, strength) for salt in SALTS for strength in STRENGTHS], dtype=object)
+    return choices[zipf_choice(rng, len(choices), rows, skew=0.8)]
+
+
+def generate(rows, seed=42):
+    rng = np.random.default_rng(seed)
+
+    # Brand names repeat across forms and strengths, like the real data
+    bases = np.asarray(brand_names(rng, max(rows // 3, 100)), dtype=object)
+    suffixes = np.asarray(SUFFIXES, dtype=object)[rng.integers(0, len(SUFFIXES), size=rows)]
+    forms = np.asarray(FORMS, dtype=object)[rng.integers(0, len(FORMS), size=rows)]
+    names = bases[rng.integers(0, len(bases), size=rows)] + ' ' + suffixes + ' ' + forms
+    names = pd.Series(names).str.replace('  ', ' ', regex=False).to_numpy(dtype=object)
+
+    manufacturers = np.asarray(MAJOR_MANUFACTURERS + [f'{name} Pharma Pvt Ltd' for name in
+                                                      brand_names(rng, max(rows // 35, 50))], dtype=object)
+    prices = np.round(rng.lognormal(4.2, 1.3, size=rows), 2)
+    prices[rng.random(rows) < 0.001] = np.nan
+
+    second = compositions(rng, rows, second=True)
+    second[rng.random(rows) >= 0.4] = None
+
+    return pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'name': names,
+        'price(₹)': prices,
+        'Is_discontinued': np.where(rng.random(rows) < 0.03, 'TRUE', 'FALSE'),
+        'manufacturer_name': manufacturers[zipf_choice(rng, len(manufacturers), rows)],
+        'type': np.where(rng.random(rows) < 0.995, 'allopathy', 'ayurvedic'),
+        'pack_size_label': np.asarray(PACKS, dtype=object)[rng.integers(0, len(PACKS), size=rows)],
+        'short_composition1': compositions(rng, rows),
+        'short_composition2': second
+    }, columns=COLUMNS)
+
+
+def write_dataset(rows, path, seed=42):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    generate(rows, seed).to_csv(path, index=False)
+    return path
+
+
+def default_path(size, seed=42):
+    return os.path.join(DATA_DIR, f'synthetic_{str(size).lower()}_{seed}.csv')
+
+
+def dataset_path(size, seed=42):
+    # The synthetic CSV for size, generated on first use
+    path = default_path(size, seed)
+    if not os.path.exists(path):
+        write_dataset(size_rows(size), path, seed)
+    return path
+
+
+def main():
+    size = sys.argv[1] if len(sys.argv) > 1 else '10k'
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 42
+    path = sys.argv[2] if len(sys.argv) > 2 else default_path(size, seed)
+
+    start = time.perf_counter()
+    write_dataset(size_rows(size), path, seed)
+    print(f"Wrote {size_rows(size)} rows to {path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# Measure per-worker memory of the gunicorn deployment with and without
+# preloading the dataset in the master (Linux only: reads /proc/<pid>/smaps_rollup).
+#
+#   python benchmarks/worker_rss.py [path/to/A_Z_medicines_dataset_of_India.csv] [workers]
+#
+# RSS counts shared pages in every process; PSS splits them between the
+# processes sharing them, so the PSS total is the real memory cost.
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 5077
+
+WARMUP_PATHS = ['/api/summary', '/api/manufacturers', '/api/price-stats', '/api/companies',
+                '/api/search?q=para', '/api/suggestions?q=amlo', '/api/filter-by-company?company=Cipla%20Ltd']
+
+
+def memory_kb(pid):
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields.get('Rss', 0),
+        'pss': fields.get('Pss', 0),
+        'private': fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    }
+
+
+def child_pids(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def get(path):
+    with urllib.request.urlopen(f'http://127.0.0.1:{PORT}{path}', timeout=60) as response:
+        return response.read()
+
+
+def wait_until_loaded(master, workers, deadline=300):
+    start = time.time()
+    while time.time() - start < deadline:
+        time.sleep(1)
+        if len(child_pids(master)) < workers:
+            continue
+        try:
+            if b'error' not in get('/api/summary'):
+                break
+        except OSError:
+            pass
+    # Without preloading each worker loads on its own; wait for memory to settle
+    previous = None
+    while time.time() - start < deadline:
+        current = [memory_kb(pid)['rss'] for pid in child_pids(master)]
+        if current == previous:
+            return
+        previous = current
+        time.sleep(2)
+
+
+def measure(csv_path, workers, preload):
+    env = dict(os.environ, PHARMAVISION_CSV=csv_path, PHARMAVISION_PRELOAD='1' if preload else '0')
+    master = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', 'app:app', '-w', str(workers), '-b', f'127.0.0.1:{PORT}'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_loaded(master.pid, workers)
+        for _ in range(workers * 5):
+            for path in WARMUP_PATHS:
+                get(path)
+        return memory_kb(master.pid), [memory_kb(pid) for pid in child_pids(master.pid)]
+    finally:
+        master.terminate()
+        master.wait()
+
+
+def main():
+    csv_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(BASE_DIR, 'A_Z_medicines_dataset_of_India.csv')
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    for preload in (False, True):
+        master, children = measure(os.path.abspath(csv_path), workers, preload)
+        print(f"\n{'Preloaded in master' if preload else 'Loaded per worker'} ({workers} workers)")
+        print("-" * 50)
+        print(f"{'Process':<10} {'RSS MB':>10} {'PSS MB':>10} {'Private MB':>12}")
+        for label, mem in [('master', master)] + [(f'worker {i}', mem) for i, mem in enumerate(children, 1)]:
+            print(f"{label:<10} {mem['rss'] / 1024:>10.1f} {mem['pss'] / 1024:>10.1f} {mem['private'] / 1024:>12.1f}")
+        total_pss = (master['pss'] + sum(mem['pss'] for mem in children)) / 1024
+        print(f"{'total':<10} {'':>10} {total_pss:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
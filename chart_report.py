@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+from compact_frame import value_counts
+
+CHART_DPI = 300
+MANIFEST_FILE = 'report_manifest.json'
+# Bump when a render function changes, so charts with unchanged data redraw
+RENDER_VERSION = 1
+
+
+def manufacturers_aggregate(analyzer):
+    top_manufacturers = value_counts(analyzer.df['manufacturer_name']).head(15)
+    return {'labels': top_manufacturers.index.tolist(), 'counts': top_manufacturers.values.tolist()}
+
+
+def prices_aggregate(analyzer):
+    # The 50 bins plt.hist() would use, so the chart is drawn from counts
+    counts, edges = np.histogram(analyzer.price_histogram.prices, bins=50)
+    return {'edges': edges.tolist(), 'counts': counts.tolist()}
+
+
+def compositions_aggregate(analyzer):
+    composition_counts = analyzer.composition_engine.composition_counts().head(15)
+    return {'labels': composition_counts.index.tolist(), 'counts': composition_counts.values.tolist()}
+
+
+def render_manufacturers(data):
+    plt.figure(figsize=(12, 8))
+    # Index named like the value_counts() result, which labels the y axis
+    pd.Series(data['counts'], index=pd.Index(data['labels'], name='manufacturer_name'), dtype=np.int64).plot(kind='barh')
+    plt.title('Top 15 Manufacturers by Number of Medicines')
+    plt.xlabel('Number of Medicines')
+
+
+def render_prices(data):
+    plt.figure(figsize=(12, 6))
+    plt.hist(data['edges'][:-1], bins=data['edges'], weights=data['counts'], edgecolor='black', alpha=0.7)
+    plt.title('Distribution of Medicine Prices')
+    plt.xlabel('Price (Rs)')
+    plt.ylabel('Frequency')
+    plt.yscale('log')
+
+
+def render_compositions(data):
+    plt.figure(figsize=(14, 8))
+    pd.Series(data['counts'], index=data['labels'], dtype=np.int64).plot(kind='bar')
+    plt.title('Top 15 Most Common Chemical Compositions')
+    plt.xlabel('Chemical Composition')
+    plt.ylabel('Frequency')
+    plt.xticks(rotation=45, ha='right')
+
+
+# name -> (file, aggregate(analyzer), render(aggregate))
+CHARTS = {
+    'top_manufacturers': ('top_manufacturers.png', manufacturers_aggregate, render_manufacturers),
+    'price_distribution': ('price_distribution.png', prices_aggregate, render_prices),
+    'common_compositions': ('common_compositions.png', compositions_aggregate, render_compositions),
+}
+
+
+def draw_chart(name, data, path):
+    CHARTS[name][2](data)
+    plt.tight_layout()
+    plt.savefig(path, dpi=CHART_DPI, bbox_inches='tight')
+
+
+def render_job(name, data, path):
+    # Runs in a pool worker: headless backend and the analyzer's plot style
+    plt.switch_backend('Agg')
+    plt.style.use('default')
+    sns.set_palette("husl")
+
+    start = time.perf_counter()
+    draw_chart(name, data, path)
+    plt.close('all')
+    return time.perf_counter() - start
+
+
+def aggregate_hash(name, data):
+    content = json.dumps({'chart': name, 'data': data, 'dpi': CHART_DPI, 'version': RENDER_VERSION}, sort_keys=True)
+    return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+
+def read_manifest(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+class ChartReport:
+    # Batch chart rendering for run_full_analysis: every chart's aggregate is
+    # computed up front and hashed, charts whose hash matches the previous
+    # manifest (and whose file is still there) are skipped, and the rest are
+    # drawn concurrently in a process pool with the Agg backend.
+    def __init__(self, analyzer, output_dir='.', workers=None):
+        self.analyzer = analyzer
+        self.output_dir = output_dir
+        self.workers = workers
+        self.manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        self.charts = {}
+        self.pool = None
+        self.pool_workers = 0
+        self.futures = {}
+        self.start_time = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        os.makedirs(self.output_dir, exist_ok=True)
+        previous = read_manifest(self.manifest_path).get('charts', {})
+
+        pending = []
+        for name, (filename, aggregate, _) in CHARTS.items():
+            start = time.perf_counter()
+            data = aggregate(self.analyzer)
+            chart = {
+                'file': filename,
+                'hash': aggregate_hash(name, data),
+                'aggregate_seconds': round(time.perf_counter() - start, 4)
+            }
+            path = os.path.join(self.output_dir, filename)
+            if previous.get(name, {}).get('hash') == chart['hash'] and os.path.exists(path):
+                chart['status'] = 'unchanged'
+                chart['render_seconds'] = 0.0
+            else:
+                pending.append((name, data, path))
+            self.charts[name] = chart
+
+        if pending:
+            self.pool_workers = self.workers or min(len(pending), os.cpu_count() or 1)
+            self.pool = ProcessPoolExecutor(max_workers=self.pool_workers)
+            self.futures = {name: self.pool.submit(render_job, name, data, path) for name, data, path in pending}
+        return self
+
+    def finish(self):
+        # Wait for the pool, write the manifest and print per-chart timing
+        for name, future in self.futures.items():
+            self.charts[name]['status'] = 'rendered'
+            self.charts[name]['render_seconds'] = round(future.result(), 4)
+        if self.pool is not None:
+            self.pool.shutdown()
+
+        manifest = {
+            'generated_at': datetime.now(timezone.utc).replace(microsecond=0).isoformat(),
+            'rows': len(self.analyzer.df),
+            'workers': self.pool_workers,
+            'total_seconds': round(time.perf_counter() - self.start_time, 4),
+            'charts': self.charts
+        }
+        with open(self.manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        print(f"\n{'Chart':<22} {'Status':<10} {'Aggregate':>10} {'Render':>10}")
+        print("-" * 55)
+        for name, chart in self.charts.items():
+            print(f"{name:<22} {chart['status']:<10} {chart['aggregate_seconds']:>9.3f}s {chart['render_seconds']:>9.3f}s")
+        print(f"Manifest written to {self.manifest_path} ({manifest['total_seconds']:.2f}s total)")
+        return manifest
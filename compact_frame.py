@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+
+# Low-cardinality text columns held as dictionary-encoded categoricals
+CATEGORICAL_COLUMNS = ['manufacturer_name', 'type', 'pack_size_label', 'short_composition1', 'short_composition2']
+
+BOOLEAN_VALUES = {'TRUE': True, 'FALSE': False, 'True': True, 'False': False, True: True, False: False}
+
+
+def compact_dtypes(df):
+    # Smallest dtypes that keep every value: categoricals for repeated text,
+    # downcast integers, and a real bool for the discontinued flag. Prices stay
+    # float64 because float32 cannot hold two-decimal rupee amounts exactly.
+    df = df.copy(deep=False)
+    for column in CATEGORICAL_COLUMNS:
+        if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype('category')
+
+    for column in df.columns:
+        if df[column].dtype.kind in 'iu':
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+
+    if 'Is_discontinued' in df and df['Is_discontinued'].dtype == object:
+        flags = df['Is_discontinued'].map(BOOLEAN_VALUES)
+        if flags.notna().all():
+            df['Is_discontinued'] = flags.astype(bool)
+    return df
+
+
+def codes_and_labels(series):
+    # Integer codes (-1 for missing) and the distinct values they refer to
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), list(series.cat.categories)
+    codes, labels = pd.factorize(series, use_na_sentinel=True)
+    return codes, list(labels)
+
+
+def value_counts(series):
+    # Series.value_counts() for any column, with ties in the same order the
+    # object-dtype version gives: counts in order of first appearance, then a
+    # descending sort. (Categorical.value_counts orders ties by category.)
+    if not isinstance(series.dtype, pd.CategoricalDtype):
+        return series.value_counts()
+
+    codes = series.cat.codes.to_numpy()
+    present = codes[codes >= 0]
+    order = pd.unique(present)
+    counts = np.bincount(present, minlength=len(series.cat.categories))[order]
+    index = pd.Index(series.cat.categories.take(order), dtype=object, name=series.name)
+    return pd.Series(counts, index=index, name='count').sort_values(ascending=False)
+
+
+def memory_report(df):
+    # Bytes held by each column, counting the Python objects behind object columns
+    usage = df.memory_usage(deep=True, index=False)
+    columns = {column: {'dtype': str(df[column].dtype), 'bytes': int(usage[column])} for column in df.columns}
+    return {
+        'rows': len(df),
+        'columns': columns,
+        'total_bytes': int(usage.sum())
+    }
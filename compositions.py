@@ -0,0 +1,124 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+from compact_frame import codes_and_labels
+
+COMPOSITION_COLUMNS = ['short_composition1', 'short_composition2']
+
+# "Amoxycillin  (500mg)" -> salt "Amoxycillin", strength "500mg"
+COMPOSITION_PATTERN = re.compile(r'^(?P<salt>.*?)\s*\((?P<strength>[^()]*)\)$')
+
+
+def normalize_salt(salt):
+    return ' '.join(salt.split())
+
+
+def normalize_strength(strength):
+    strength = ' '.join(strength.lower().split())
+    # "500 mg" -> "500mg"
+    return re.sub(r'(\d)\s+(?=[a-z%])', r'\1', strength)
+
+
+def parse_composition(text):
+    match = COMPOSITION_PATTERN.match(text)
+    if not match:
+        return normalize_salt(text), ''
+    return normalize_salt(match.group('salt')), normalize_strength(match.group('strength'))
+
+
+class CompositionEngine:
+    # Both composition columns parsed once per load. Python only ever touches
+    # the distinct category strings; per-row work is integer array lookups.
+    #
+    #   compositions     distinct stripped composition strings (composition id)
+    #   salts            distinct normalized salt names (salt id)
+    #   strengths        distinct normalized strengths (strength id)
+    #   row_compositions (rows, 2) composition id per slot, -1 when empty
+    #   salt_table       long format: one row per (medicine row, slot)
+    def __init__(self, df):
+        self.compositions = []
+        self.salts = []
+        self.strengths = []
+        composition_ids = {}
+        salt_ids = {}
+        strength_ids = {}
+        composition_salt = []
+        composition_strength = []
+
+        slots = []
+        for column in COMPOSITION_COLUMNS:
+            codes, labels = codes_and_labels(df[column])
+            label_ids = np.full(len(labels) + 1, -1, dtype=np.int32)
+            for code, label in enumerate(labels):
+                # The old loops skipped the literal string 'nan' in the second column
+                if column == 'short_composition2' and str(label) == 'nan':
+                    continue
+                text = str(label).strip()
+                if text not in composition_ids:
+                    composition_ids[text] = len(self.compositions)
+                    self.compositions.append(text)
+                    salt, strength = parse_composition(text)
+                    salt_key = salt.casefold()
+                    if salt_key not in salt_ids:
+                        salt_ids[salt_key] = len(self.salts)
+                        self.salts.append(salt)
+                    if strength not in strength_ids:
+                        strength_ids[strength] = len(self.strengths)
+                        self.strengths.append(strength)
+                    composition_salt.append(salt_ids[salt_key])
+                    composition_strength.append(strength_ids[strength])
+                label_ids[code] = composition_ids[text]
+            # Code -1 (missing) indexes the trailing -1
+            slots.append(label_ids[codes])
+
+        self.row_compositions = np.column_stack(slots) if slots else np.empty((len(df), 0), dtype=np.int32)
+        self.composition_salt = np.asarray(composition_salt, dtype=np.int32)
+        self.composition_strength = np.asarray(composition_strength, dtype=np.int32)
+        self.salt_table = self._build_salt_table()
+
+    def _build_salt_table(self):
+        rows, slots = np.nonzero(self.row_compositions >= 0)
+        composition_ids = self.row_compositions[rows, slots]
+        return pd.DataFrame({
+            'row': rows.astype(np.int32),
+            'slot': (slots + 1).astype(np.int8),
+            'composition_id': composition_ids,
+            'salt_id': self.composition_salt[composition_ids],
+            'strength_id': self.composition_strength[composition_ids]
+        })
+
+    def _ids_in_list_order(self, rows=None):
+        # Composition ids in the order the old code listed them: every first
+        # composition, then every second composition
+        ids = self.row_compositions if rows is None else self.row_compositions[rows]
+        ids = ids.T.ravel()
+        return ids[ids >= 0]
+
+    def _first_seen_counts(self, rows=None):
+        ids = self._ids_in_list_order(rows)
+        order = pd.unique(ids)
+        counts = np.bincount(ids, minlength=len(self.compositions))[order]
+        return [self.compositions[i] for i in order], counts
+
+    def composition_counts(self, rows=None):
+        # Same result as pd.Series(all_compositions).value_counts()
+        labels, counts = self._first_seen_counts(rows)
+        return pd.Series(counts, index=pd.Index(labels, dtype=object), name='count').sort_values(ascending=False)
+
+    def most_common(self, n, rows=None):
+        # Same result as Counter(all_compositions).most_common(n)
+        labels, counts = self._first_seen_counts(rows)
+        order = np.argsort(-counts, kind='stable')[:n]
+        return [(labels[i], int(counts[i])) for i in order]
+
+    def salt_counts(self, rows=None):
+        # Medicines per normalized salt, counting each (row, slot) once
+        table = self.salt_table if rows is None else self.salt_table[np.asarray(rows)[self.salt_table['row']]]
+        counts = np.bincount(table['salt_id'], minlength=len(self.salts))
+        return pd.Series(counts, index=pd.Index(self.salts, dtype=object), name='count').sort_values(ascending=False, kind='stable')
+
+    def composition_complexity(self):
+        # Number of filled composition slots per row
+        return (self.row_compositions >= 0).sum(axis=1)
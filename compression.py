@@ -0,0 +1,72 @@
+import gzip
+import zlib
+
+# Brotli is optional: without it responses are only ever gzip-compressed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent as they are; the bytes saved would not pay
+# for the CPU time and the extra headers
+MIN_COMPRESS_BYTES = 1024
+
+# Encodings offered, preferred first when the client accepts several equally
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+COMPRESSIBLE_TYPES = ('application/json', 'application/x-ndjson', 'text/html', 'text/csv', 'text/plain')
+
+# Bodies compressed once per load can afford the slowest, smallest settings;
+# per-request compression uses cheaper ones
+STATIC_LEVELS = {'br': 11, 'gzip': 9}
+DYNAMIC_LEVELS = {'br': 5, 'gzip': 6}
+
+
+def compress(body, encoding, static=False):
+    level = (STATIC_LEVELS if static else DYNAMIC_LEVELS)[encoding]
+    if encoding == 'br':
+        return brotli.compress(body, quality=level)
+    # mtime=0 keeps the output (and so the ETag) the same on every load
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def precompress(body):
+    # {encoding: compressed body} for each encoding that makes body smaller;
+    # empty when body is under MIN_COMPRESS_BYTES
+    if len(body) < MIN_COMPRESS_BYTES:
+        return {}
+    encoded = {}
+    for encoding in ENCODINGS:
+        data = compress(body, encoding, static=True)
+        if len(data) < len(body):
+            encoded[encoding] = data
+    return encoded
+
+
+def negotiate(accept_encodings, available=ENCODINGS):
+    # The encoding of available the client rates highest in its
+    # Accept-Encoding, or None to send the body as it is
+    best = None
+    best_quality = 0
+    for encoding in ENCODINGS:
+        quality = accept_encodings[encoding] if encoding in available else 0
+        if quality > best_quality:
+            best = encoding
+            best_quality = quality
+    return best
+
+
+def compress_chunks(chunks, encoding):
+    # A streamed body compressed as it goes
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=DYNAMIC_LEVELS['br'])
+        process, finish = compressor.process, compressor.finish
+    else:
+        # wbits 31: a gzip header and trailer around the deflate stream
+        compressor = zlib.compressobj(DYNAMIC_LEVELS['gzip'], zlib.DEFLATED, 31)
+        process, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
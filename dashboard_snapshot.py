@@ -0,0 +1,100 @@
+import functools
+import hashlib
+from datetime import datetime, timezone
+
+from compact_frame import value_counts
+from compression import precompress
+
+
+# Dashboard sections /api/dashboard returns together
+DASHBOARD_SECTIONS = ('summary', 'manufacturers', 'paracetamol', 'price-stats', 'diabetes', 'compositions', 'companies')
+
+
+class Payload:
+    # compress: also keep compressed copies ({encoding: body}), made once
+    # here rather than per request
+    def __init__(self, body, compress=False):
+        self.body = body
+        self.etag = hashlib.sha1(body).hexdigest()
+        self.encoded = precompress(body) if compress else {}
+
+
+class DashboardSnapshot:
+    # Every dashboard aggregate computed once per dataset load, plus the
+    # encoded response bodies. Build a new snapshot when the data reloads.
+    def __init__(self, analyzer, encode, last_modified=None):
+        self.sections = build_sections(analyzer)
+        if last_modified is None:
+            self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        else:
+            self.last_modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+        self.encode = encode
+        self.payloads = {name: Payload(encode(data), compress=True) for name, data in self.sections.items()}
+        # Every section in one body, for the first page load
+        self.payloads['dashboard'] = Payload(encode({name: self.sections[name] for name in DASHBOARD_SECTIONS}), compress=True)
+        self.price_histogram = analyzer.price_histogram
+        self.memory = analyzer.memory_report()
+        # Non-default histograms, encoded on first request. The cached function
+        # does not refer back to the snapshot, so a replaced snapshot is freed
+        # by reference counting alone, without waiting for the cyclic gc.
+        self.price_stats_payload = functools.lru_cache(maxsize=256)(functools.partial(
+            price_stats_payload, self.sections['price-stats'], self.price_histogram, encode))
+
+
+def price_stats_payload(section, price_histogram, encode, bins, scale, low, high):
+    data = dict(section)
+    data['histogram'] = price_histogram.histogram(bins, scale, low, high)
+    return Payload(encode(data), compress=True)
+
+
+def build_sections(analyzer):
+    df = analyzer.df
+    sections = {}
+
+    sections['summary'] = {
+        'total_medicines': len(df),
+        'total_manufacturers': df['manufacturer_name'].nunique(),
+        'avg_price': round(df['price(₹)'].mean(), 2),
+        'min_price': df['price(₹)'].min(),
+        'max_price': df['price(₹)'].max(),
+        'unique_compositions': df['short_composition1'].nunique()
+    }
+
+    top_manufacturers = value_counts(df['manufacturer_name']).head(15)
+    sections['manufacturers'] = {
+        'labels': top_manufacturers.index.tolist(),
+        'data': top_manufacturers.values.tolist()
+    }
+
+    sections['companies'] = {
+        'companies': sorted(df['manufacturer_name'].dropna().unique())
+    }
+
+    composition_counts = analyzer.composition_engine.composition_counts().head(15)
+    sections['compositions'] = {
+        'labels': composition_counts.index.tolist(),
+        'data': composition_counts.values.tolist()
+    }
+
+    paracetamol_medicines = analyzer.therapeutic_class('paracetamol')
+    paracetamol_sorted = paracetamol_medicines[['name', 'manufacturer_name', 'price(₹)']].sort_values('price(₹)').head(20)
+    sections['paracetamol'] = {
+        'medicines': paracetamol_sorted.to_dict('records')
+    }
+
+    diabetes_medicines = analyzer.therapeutic_class('diabetes')
+    sections['diabetes'] = {
+        'medicines': diabetes_medicines[['name', 'manufacturer_name', 'short_composition1']].head(20).to_dict('records')
+    }
+
+    expensive = df.nlargest(10, 'price(₹)')[['name', 'manufacturer_name', 'price(₹)']]
+    cheapest = df.nsmallest(10, 'price(₹)')[['name', 'manufacturer_name', 'price(₹)']]
+    price_histogram = analyzer.price_histogram
+    sections['price-stats'] = {
+        'expensive': expensive.to_dict('records'),
+        'cheapest': cheapest.to_dict('records'),
+        'histogram': price_histogram.histogram(*price_histogram.resolve()),
+        'percentiles': price_histogram.percentiles()
+    }
+
+    return sections
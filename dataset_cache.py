@@ -0,0 +1,159 @@
+import hashlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from packed_strings import PackedStrings
+
+# Bump when the on-disk layout changes so old caches are rebuilt
+CACHE_VERSION = 2
+
+
+def default_cache_dir(csv_file):
+    return os.path.splitext(csv_file)[0] + '.cache'
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_dataset(csv_file, cache_dir=None, categorical=()):
+    # Read the dataset from its columnar cache when the cache matches the CSV,
+    # otherwise parse the CSV and (re)write the cache for the next start.
+    # Columns named in categorical come back from the cache as categoricals
+    # built straight from the stored codes.
+    cache_dir = cache_dir or default_cache_dir(csv_file)
+
+    meta = read_meta(cache_dir)
+    if meta and cache_is_fresh(meta, csv_file, cache_dir):
+        try:
+            return read_cache(cache_dir, meta, categorical)
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable dataset cache: {e}")
+
+    df = pd.read_csv(csv_file)
+    try:
+        write_cache(df, csv_file, cache_dir)
+    except Exception as e:
+        print(f"⚠️ Could not write dataset cache: {e}")
+    return df
+
+
+def read_meta(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return meta if meta.get('version') == CACHE_VERSION else None
+
+
+def cache_is_fresh(meta, csv_file, cache_dir):
+    stat = os.stat(csv_file)
+    if meta['csv_size'] != stat.st_size:
+        return False
+    if meta['csv_mtime_ns'] == stat.st_mtime_ns:
+        return True
+
+    # Touched but possibly unchanged: trust the content hash and remember the new mtime
+    if meta['csv_sha1'] != file_sha1(csv_file):
+        return False
+    meta['csv_mtime_ns'] = stat.st_mtime_ns
+    try:
+        write_meta(cache_dir, meta)
+    except OSError:
+        pass
+    return True
+
+
+def write_meta(cache_dir, meta):
+    tmp_path = os.path.join(cache_dir, 'meta.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, os.path.join(cache_dir, 'meta.json'))
+
+
+def encode_strings(values):
+    # Dictionary-encode an object column: int32 codes (-1 for missing) plus the
+    # distinct strings, sorted like a pandas categorical's, packed as one UTF-8
+    # buffer with int64 offsets.
+    codes, categories = pd.factorize(values, sort=True, use_na_sentinel=True)
+    packed = PackedStrings.from_strings(categories)
+    return codes.astype(np.int32), packed.offsets, np.frombuffer(packed.data, dtype=np.uint8)
+
+
+def decode_strings(offsets, data):
+    return PackedStrings(data.tobytes(), np.asarray(offsets)).tolist()
+
+
+def write_cache(df, csv_file, cache_dir):
+    stat = os.stat(csv_file)
+    meta = {
+        'version': CACHE_VERSION,
+        'csv_size': stat.st_size,
+        'csv_mtime_ns': stat.st_mtime_ns,
+        'csv_sha1': file_sha1(csv_file),
+        'columns': []
+    }
+
+    arrays = {}
+    for i, column in enumerate(df.columns):
+        series = df[column]
+        if series.dtype == object:
+            if pd.api.types.infer_dtype(series, skipna=True) not in ('string', 'empty'):
+                raise ValueError(f"column {column!r} mixes strings with other values")
+            codes, offsets, data = encode_strings(series.to_numpy())
+            arrays[f'col{i}_codes.npy'] = codes
+            arrays[f'col{i}_offsets.npy'] = offsets
+            arrays[f'col{i}_data.npy'] = data
+            meta['columns'].append({'name': column, 'kind': 'strings'})
+        elif series.dtype.kind in 'biuf':
+            arrays[f'col{i}.npy'] = series.to_numpy()
+            meta['columns'].append({'name': column, 'kind': 'numeric', 'dtype': series.dtype.str})
+        else:
+            raise ValueError(f"column {column!r} has unsupported dtype {series.dtype}")
+
+    # Build the new cache beside the old one and swap it in with renames
+    tmp_dir = f"{cache_dir}.tmp-{os.getpid()}"
+    old_dir = f"{cache_dir}.old-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        for filename, array in arrays.items():
+            np.save(os.path.join(tmp_dir, filename), array, allow_pickle=False)
+        write_meta(tmp_dir, meta)
+
+        if os.path.exists(cache_dir):
+            os.rename(cache_dir, old_dir)
+        os.rename(tmp_dir, cache_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def read_cache(cache_dir, meta, categorical=()):
+    def load(filename):
+        return np.load(os.path.join(cache_dir, filename), mmap_mode='r', allow_pickle=False)
+
+    columns = {}
+    for i, info in enumerate(meta['columns']):
+        if info['kind'] == 'strings':
+            categories = decode_strings(load(f'col{i}_offsets.npy'), load(f'col{i}_data.npy'))
+            codes = load(f'col{i}_codes.npy')
+            if info['name'] in categorical:
+                columns[info['name']] = pd.Categorical.from_codes(
+                    codes, categories=pd.Index(categories, dtype=object))
+            else:
+                # Code -1 (missing) picks the trailing NaN
+                lookup = np.array(categories + [np.nan], dtype=object)
+                columns[info['name']] = lookup[codes]
+        else:
+            columns[info['name']] = np.asarray(load(f'col{i}.npy'), dtype=np.dtype(info['dtype']))
+    return pd.DataFrame(columns)
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from compact_frame import BOOLEAN_VALUES
+
+# Optional delta column: 'upsert' (the default when empty) or 'delete'
+DELTA_OP_COLUMN = 'op'
+DELTA_OPS = ('upsert', 'delete')
+
+
+def read_delta(path, df):
+    # Text columns of df are read as text even when every delta value looks
+    # numeric, so they match what the full CSV gave; numbers parse as usual
+    text_columns = [column for column in df.columns if df[column].dtype.kind not in 'iufb']
+    return pd.read_csv(path, dtype={column: str for column in text_columns + [DELTA_OP_COLUMN]})
+
+
+def delta_ops(delta):
+    if DELTA_OP_COLUMN not in delta:
+        return pd.Series('upsert', index=delta.index)
+    ops = delta[DELTA_OP_COLUMN].fillna('upsert').astype(str).str.strip().str.lower()
+    unknown = sorted(set(ops) - set(DELTA_OPS))
+    if unknown:
+        raise ValueError(f"Unknown delta op: {', '.join(unknown)}")
+    return ops
+
+
+def column_values(series):
+    # Plain numpy values to splice: objects for text (categoricals included),
+    # and 64-bit numbers so new values are never truncated before compact_dtypes
+    if series.dtype.kind in 'iu':
+        return series.to_numpy(dtype=np.int64)
+    if series.dtype.kind == 'f':
+        return series.to_numpy(dtype=np.float64)
+    if series.dtype.kind == 'b':
+        return series.to_numpy(dtype=bool)
+    return series.to_numpy(dtype=object)
+
+
+def delta_values(series, dtype):
+    if dtype == bool:
+        flags = series.map(BOOLEAN_VALUES)
+        if flags.isna().any():
+            raise ValueError(f"Non-boolean values in delta column {series.name}")
+        return flags.to_numpy(dtype=bool)
+    return series.to_numpy(dtype=dtype)
+
+
+def apply_delta(df, delta):
+    # Rows of df with a delta keyed on id applied, as if the CSV had been
+    # edited in place: an upsert of a known id replaces that row where it
+    # stands, one of a new id is appended (in delta order), and a delete drops
+    # the row. When an id repeats in the delta its last entry wins.
+    # Returns the new frame and counts of what changed.
+    if 'id' not in delta:
+        raise ValueError("Delta has no id column")
+    delta = delta.assign(id=pd.to_numeric(delta['id'])).drop_duplicates('id', keep='last')
+    ops = delta_ops(delta)
+
+    upserts = delta[(ops == 'upsert').to_numpy()]
+    missing = [column for column in df.columns if column not in upserts]
+    if len(upserts) and missing:
+        raise ValueError(f"Delta upserts are missing columns: {', '.join(missing)}")
+
+    ids = pd.Index(df['id'].to_numpy())
+    if not ids.is_unique:
+        raise ValueError("Dataset ids are not unique")
+    delete_rows = ids.get_indexer(delta.loc[(ops == 'delete').to_numpy(), 'id'].to_numpy())
+    upsert_rows = ids.get_indexer(upserts['id'].to_numpy())
+
+    keep = np.ones(len(df), dtype=bool)
+    keep[delete_rows[delete_rows >= 0]] = False
+    old_to_new = np.cumsum(keep) - 1
+    updated = upsert_rows >= 0
+    # Where each updated row lands once the deleted rows are gone
+    updated_rows = old_to_new[upsert_rows[updated]]
+
+    columns = {}
+    for column in df.columns:
+        values = column_values(df[column])[keep]
+        if updated.any():
+            values[updated_rows] = delta_values(upserts[column][updated], values.dtype)
+        if (~updated).any():
+            values = np.concatenate([values, delta_values(upserts[column][~updated], values.dtype)])
+        columns[column] = values
+
+    counts = {
+        'updated': int(updated.sum()),
+        'inserted': int((~updated).sum()),
+        'deleted': int((delete_rows >= 0).sum()),
+        'not_found': int((delete_rows < 0).sum())
+    }
+    return pd.DataFrame(columns, columns=df.columns), counts
@@ -0,0 +1,209 @@
+import numpy as np
+
+from compact_frame import codes_and_labels
+from search_index import ValueIndex
+
+# Single-valued facets and their columns; 'salt' (either composition slot) and
+# 'price' (a range) are handled on their own
+CATEGORY_FACETS = {'manufacturer': 'manufacturer_name', 'type': 'type', 'discontinued': 'Is_discontinued'}
+FACETS = tuple(CATEGORY_FACETS) + ('salt', 'price')
+
+# A value held by more than 1/DENSE_FRACTION of the rows is kept as a bitmap,
+# which is then smaller than its int32 row ids
+DENSE_FRACTION = 32
+
+DEFAULT_FACET_LIMIT = 10
+
+
+def pack(rows, size):
+    # Packed bitmap (one bit per row, numpy bit order) of the given row ids
+    bits = np.zeros(size, dtype=bool)
+    bits[rows] = True
+    return np.packbits(bits)
+
+
+def smallest_codes(codes):
+    # Value codes plus one (0 for missing) in the narrowest integer type
+    codes = np.asarray(codes, dtype=np.int64) + 1
+    return codes.astype(np.min_scalar_type(int(codes.max()) if len(codes) else 0))
+
+
+def parse_price(value):
+    # A price bound from the query string; None when not given
+    if value is None or not str(value).strip():
+        return None
+    try:
+        price = float(value)
+    except ValueError:
+        price = float('nan')
+    if not np.isfinite(price):
+        raise ValueError('min_price and max_price must be numbers')
+    return price
+
+
+def all_of(bitmaps):
+    # AND of the bitmaps; None (every row) when there are none
+    result = None
+    for bitmap in bitmaps:
+        result = bitmap.copy() if result is None else np.bitwise_and(result, bitmap, out=result)
+    return result
+
+
+class RowSets:
+    # The rows of each value of one column, roaring-style: a packed bitmap for
+    # a dense value, the sorted int32 row ids for a sparse one
+    def __init__(self, rows, offsets, size):
+        self.size = size
+        self.sets = []
+        for value in range(len(offsets) - 1):
+            value_rows = rows[offsets[value]:offsets[value + 1]]
+            if len(value_rows) * DENSE_FRACTION > size:
+                self.sets.append(pack(value_rows, size))
+            else:
+                self.sets.append(value_rows.astype(np.int32))
+
+    def union(self, values):
+        # Bitmap of the rows holding any of values: dense sets are OR'd in
+        # place, sparse ones packed together in one go
+        sparse = [self.sets[value] for value in values if self.sets[value].dtype != np.uint8]
+        result = pack(np.concatenate(sparse), self.size) if sparse else pack([], self.size)
+        for value in values:
+            if self.sets[value].dtype == np.uint8:
+                np.bitwise_or(result, self.sets[value], out=result)
+        return result
+
+
+class FacetIndex:
+    # Faceted filtering over manufacturer, type, discontinued, salt and price.
+    # Values of one facet are OR'd, facets AND'd, all as bitwise operations on
+    # packed row bitmaps. Facet counts are bincounts of per-row value codes
+    # (one array per composition slot for salts, shifted so 0 is missing)
+    # over the rows the other facets' filters let through.
+    def __init__(self, df, engine, salt_index):
+        self.size = len(df)
+        self.codes = {}
+        self.labels = {}
+        self.value_ids = {}
+        self.row_sets = {}
+        self.totals = {}
+        for facet, column in CATEGORY_FACETS.items():
+            codes, labels = codes_and_labels(df[column])
+            index = ValueIndex(df[column])
+            self.codes[facet] = [smallest_codes(codes)]
+            self.labels[facet] = [label.item() if isinstance(label, np.generic) else label for label in labels]
+            self.row_sets[facet] = RowSets(index.rows, index.offsets, self.size)
+            self.totals[facet] = np.diff(index.offsets)
+
+        # Salt ids per composition slot (-1 when empty); a salt repeated in the
+        # second slot is blanked so the row counts once
+        row_salts = np.append(engine.composition_salt, -1)[engine.row_compositions]
+        if row_salts.shape[1] > 1:
+            row_salts[row_salts[:, 1] == row_salts[:, 0], 1] = -1
+        self.codes['salt'] = [smallest_codes(slot) for slot in row_salts.T]
+        self.labels['salt'] = engine.salts
+        self.row_sets['salt'] = RowSets(salt_index.rows, salt_index.offsets, self.size)
+        self.totals['salt'] = np.diff(salt_index.offsets)
+
+        # Case-insensitive lookup; labels differing only in case share a key
+        for facet, labels in self.labels.items():
+            self.value_ids[facet] = {}
+            for value_id, label in enumerate(labels):
+                self.value_ids[facet].setdefault(str(label).casefold(), []).append(value_id)
+
+        # Prices in ascending order with their rows, missing prices left out
+        self.prices = df['price(₹)'].to_numpy(dtype=np.float64)
+        order = np.argsort(self.prices, kind='stable')
+        self.price_rows = order[~np.isnan(self.prices[order])]
+        self.sorted_prices = self.prices[self.price_rows]
+
+    def lookup(self, facet, values):
+        # Value ids of facet matching any of values; unknown values match nothing
+        return [value_id for value in values for value_id in self.value_ids[facet].get(str(value).strip().casefold(), [])]
+
+    def salt_bitmap(self, expression):
+        # The /api/therapeutic salt syntax: 'Paracetamol,Caffeine|Ibuprofen' is
+        # (Paracetamol AND Caffeine) OR Ibuprofen; a group naming an unknown
+        # salt matches nothing
+        result = pack([], self.size)
+        for group in expression.split('|'):
+            names = [name for name in group.split(',') if name.strip()]
+            salt_ids = [self.lookup('salt', [name]) for name in names]
+            if not names or not all(salt_ids):
+                continue
+            np.bitwise_or(result, all_of(self.row_sets['salt'].union(ids) for ids in salt_ids), out=result)
+        return result
+
+    def price_bitmap(self, low, high):
+        # Rows priced within [low, high]; either end may be None
+        start = 0 if low is None else np.searchsorted(self.sorted_prices, low, side='left')
+        end = len(self.sorted_prices) if high is None else np.searchsorted(self.sorted_prices, high, side='right')
+        return pack(self.price_rows[start:end], self.size)
+
+    def filter_bitmaps(self, filters):
+        # {facet: bitmap of the rows passing its filter} for each facet filtered on
+        bitmaps = {}
+        for facet in CATEGORY_FACETS:
+            if filters.get(facet):
+                bitmaps[facet] = self.row_sets[facet].union(self.lookup(facet, filters[facet]))
+        if filters.get('salts'):
+            bitmaps['salt'] = self.salt_bitmap(filters['salts'])
+        low, high = [parse_price(value) for value in filters.get('price') or (None, None)]
+        if low is not None or high is not None:
+            if low is not None and high is not None and low > high:
+                raise ValueError('min_price must not be more than max_price')
+            bitmaps['price'] = self.price_bitmap(low, high)
+        return bitmaps
+
+    def mask(self, bitmap):
+        # One bool per row; None (no filter) stays None
+        if bitmap is None:
+            return None
+        return np.unpackbits(bitmap, count=self.size).view(bool)
+
+    def facet_values(self, facet, mask, limit, selected):
+        # The limit values with the most rows (ties in value order), plus any
+        # selected value not among them
+        if mask is None:
+            counts = self.totals[facet]
+        else:
+            size = len(self.labels[facet]) + 1
+            counts = sum(np.bincount(codes[mask], minlength=size) for codes in self.codes[facet])[1:]
+        top = np.argsort(-counts, kind='stable')[:limit]
+        value_ids = [value_id for value_id in top.tolist() if counts[value_id]]
+        value_ids += [value_id for value_id in selected if value_id not in value_ids]
+        return [{'value': self.labels[facet][value_id], 'count': int(counts[value_id])} for value_id in value_ids]
+
+    def price_range(self, mask):
+        prices = self.sorted_prices if mask is None else self.prices[mask]
+        prices = prices[~np.isnan(prices)]
+        if not len(prices):
+            return {'min': None, 'max': None, 'count': 0}
+        return {'min': float(prices.min()), 'max': float(prices.max()), 'count': len(prices)}
+
+    def query(self, filters, facet_limit=DEFAULT_FACET_LIMIT):
+        # Sorted row ids passing every filter, and the facet counts. filters:
+        # {'manufacturer' / 'type' / 'discontinued': [values], 'salts':
+        # expression, 'price': (low, high)}, the bounds as numbers or query
+        # string values. Raises ValueError with a message for the client on a
+        # bad price range.
+        bitmaps = self.filter_bitmaps(filters)
+        matched = self.mask(all_of(bitmaps.values()))
+        facets = {}
+        for facet in FACETS:
+            # Counted as if this facet were not filtered on, so the values a
+            # selection could switch to are listed too
+            if facet in bitmaps:
+                mask = self.mask(all_of(bitmap for name, bitmap in bitmaps.items() if name != facet))
+            else:
+                mask = matched
+            if facet == 'price':
+                facets[facet] = self.price_range(mask)
+                continue
+            if facet == 'salt':
+                selected = self.lookup('salt', filters.get('salts', '').replace('|', ',').split(','))
+            else:
+                selected = self.lookup(facet, filters.get(facet) or [])
+            facets[facet] = self.facet_values(facet, mask, facet_limit, selected)
+        if matched is None:
+            return np.arange(self.size, dtype=np.int64), facets
+        return np.flatnonzero(matched), facets
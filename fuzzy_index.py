@@ -0,0 +1,263 @@
+import bisect
+import re
+
+import numpy as np
+import pandas as pd
+
+from packed_strings import PackedStrings
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Vocabulary words compared in full against each query word
+CANDIDATE_WORDS = 32
+# A prefix match (the word being typed) scores a little below a full match
+PREFIX_PENALTY = 0.9
+
+EMPTY_IDS = np.empty(0, dtype=np.int64)
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def allowed_edits(word):
+    # Typos tolerated in a query word of this length; short words must be exact
+    if len(word) < 4:
+        return 0
+    if len(word) < 6:
+        return 1
+    if len(word) < 10:
+        return 2
+    return 3
+
+
+def edit_distances(a, b):
+    # Levenshtein distance between a and b, and the smallest distance between
+    # a and any prefix of b, with Hyyrö's bit-parallel algorithm: one pass of
+    # integer operations per character of b
+    if not a:
+        return len(b), 0
+    peq = {}
+    for i, ch in enumerate(a):
+        peq[ch] = peq.get(ch, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    pv, mv, score = full, 0, len(a)
+    best_prefix = score
+    for ch in b:
+        eq = peq.get(ch, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & last:
+            score += 1
+        elif mh & last:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+        best_prefix = min(best_prefix, score)
+    return score, best_prefix
+
+
+def word_grams(word):
+    # Trigrams of the word padded with spaces, so short words and word
+    # boundaries count too
+    padded = f' {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def csr(owner_ids, item_ids, owners):
+    # Sorted item ids per owner as one flat array plus offsets
+    order = np.lexsort((item_ids, owner_ids))
+    counts = np.bincount(owner_ids, minlength=owners)
+    return item_ids[order], np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+
+def csr_positions(offsets, owners):
+    # Positions in the flat array of every item of the given owners, and where
+    # each owner's items start among them
+    starts = offsets[owners]
+    lengths = offsets[owners + 1] - starts
+    group_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    return np.repeat(starts - group_starts, lengths) + np.arange(lengths.sum()), group_starts
+
+
+class FuzzyIndex:
+    # Typo-tolerant lookup of distinct values (names, manufacturers, salts).
+    # Values are split into words; a trigram index over the word vocabulary
+    # finds the words closest to each query word, which a bit-parallel edit
+    # distance then confirms and scores. Values containing a close word for
+    # every query word are ranked by the mean of those word scores.
+    def __init__(self, values):
+        self.values = PackedStrings.from_strings(values)
+        value_tokens = [tokenize(value) for value in values]
+        counts = [len(tokens) for tokens in value_tokens]
+        codes, vocabulary = pd.factorize(np.array([token for tokens in value_tokens for token in tokens], dtype=object))
+        self.words = list(vocabulary)
+        self.word_ids = dict(zip(self.words, range(len(self.words))))
+        self.word_lengths = np.array([len(word) for word in self.words], dtype=np.int64)
+        # Vocabulary in sorted order, for prefixes too short to have typos
+        self.sorted_word_ids = np.array(sorted(range(len(self.words)), key=self.words.__getitem__), dtype=np.int64)
+        self.sorted_words = [self.words[i] for i in self.sorted_word_ids]
+
+        # value -> word ids, and word -> value ids
+        owners = np.repeat(np.arange(len(values), dtype=np.int64), counts)
+        codes = codes.astype(np.int64)
+        self.value_words = codes
+        self.value_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.word_values, self.word_offsets = csr(codes, owners, len(self.words))
+        self.word_value_counts = np.diff(self.word_offsets)
+
+        # trigram -> word ids
+        grams = []
+        gram_words = []
+        self.gram_counts = np.empty(len(self.words), dtype=np.int64)
+        for word_id, word in enumerate(self.words):
+            word_gram_set = word_grams(word)
+            grams.extend(word_gram_set)
+            gram_words.extend([word_id] * len(word_gram_set))
+            self.gram_counts[word_id] = len(word_gram_set)
+        gram_codes, gram_list = pd.factorize(np.array(grams, dtype=object))
+        self.grams = dict(zip(gram_list, range(len(gram_list))))
+        self.gram_words, self.gram_offsets = csr(gram_codes.astype(np.int64), np.asarray(gram_words, dtype=np.int64), len(gram_list))
+
+    def match_words(self, word, prefix=False):
+        # Score of every vocabulary word against word (0 for no match): words
+        # within the allowed edits, and with prefix also words that merely
+        # start close to it. None when nothing matches.
+        scores = np.zeros(len(self.words))
+        max_edits = allowed_edits(word)
+        if max_edits == 0:
+            # Too short for typos: the word itself, or with prefix any word starting with it
+            if prefix:
+                lo = bisect.bisect_left(self.sorted_words, word)
+                hi = bisect.bisect_left(self.sorted_words, word + '\U0010ffff', lo)
+                scores[self.sorted_word_ids[lo:hi]] = PREFIX_PENALTY
+            word_id = self.word_ids.get(word)
+            if word_id is not None:
+                scores[word_id] = 1.0
+            return scores if scores.any() else None
+
+        query_grams = word_grams(word)
+        lists = [self.gram_words[self.gram_offsets[code]:self.gram_offsets[code + 1]]
+                 for code in (self.grams.get(gram) for gram in query_grams) if code is not None]
+        if not lists:
+            return None
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.words))
+        candidates = np.flatnonzero(shared)
+        # Only words whose length leaves room for a match
+        lengths = self.word_lengths[candidates]
+        if prefix:
+            candidates = candidates[lengths >= len(word) - max_edits]
+        else:
+            candidates = candidates[np.abs(lengths - len(word)) <= max_edits]
+        # Words sharing the most of the query's trigrams (as a share of both
+        # words' trigrams for full matches, of the query's for prefixes)
+        overlap = shared[candidates]
+        if prefix:
+            rank = overlap / len(query_grams)
+        else:
+            rank = overlap / (len(query_grams) + self.gram_counts[candidates] - overlap)
+        if len(candidates) > CANDIDATE_WORDS:
+            top = np.argpartition(-rank, CANDIDATE_WORDS - 1)[:CANDIDATE_WORDS]
+            candidates = candidates[top]
+
+        found = False
+        for word_id in candidates.tolist():
+            candidate = self.words[word_id]
+            distance, prefix_distance = edit_distances(word, candidate)
+            score = 0.0
+            if distance <= max_edits:
+                score = 1.0 - distance / max(len(word), len(candidate))
+            if prefix and prefix_distance <= max_edits:
+                score = max(score, (1.0 - prefix_distance / len(word)) * PREFIX_PENALTY)
+            if score > 0:
+                scores[word_id] = score
+                found = True
+        return scores if found else None
+
+    def _values_with(self, word_scores):
+        # Value ids holding any matched word, with the best score among them
+        word_ids = np.flatnonzero(word_scores)
+        positions, _ = csr_positions(self.word_offsets, word_ids)
+        ids = self.word_values[positions]
+        scores = np.repeat(word_scores[word_ids], self.word_value_counts[word_ids])
+        order = np.lexsort((-scores, ids))
+        ids, scores = ids[order], scores[order]
+        first = np.ones(len(ids), dtype=bool)
+        first[1:] = ids[1:] != ids[:-1]
+        return ids[first], scores[first]
+
+    def _best_scores(self, value_ids, word_scores):
+        # Each value's best score for one query word (0 if it has no match)
+        positions, group_starts = csr_positions(self.value_offsets, value_ids)
+        return np.maximum.reduceat(word_scores[self.value_words[positions]], group_starts)
+
+    def search(self, query, limit):
+        # Up to limit (value id, score) pairs, best first; ties go to values
+        # with fewer words, then to the earlier value
+        query_words = tokenize(query)
+        if not query_words:
+            return []
+        word_scores = []
+        for i, word in enumerate(query_words):
+            scores = self.match_words(word, prefix=(i == len(query_words) - 1))
+            if scores is None:
+                return []
+            word_scores.append(scores)
+
+        # Start from the query word with the fewest candidate values, then
+        # keep only values that also match every other query word
+        sizes = [self.word_value_counts[scores > 0].sum() for scores in word_scores]
+        order = np.argsort(sizes, kind='stable')
+        value_ids, total = self._values_with(word_scores[order[0]])
+        for i in order[1:]:
+            if not len(value_ids):
+                return []
+            scores = self._best_scores(value_ids, word_scores[i])
+            keep = scores > 0
+            value_ids, total = value_ids[keep], total[keep] + scores[keep]
+
+        score = total / len(query_words)
+        word_count = self.value_offsets[value_ids + 1] - self.value_offsets[value_ids]
+        if len(value_ids) > limit:
+            # Coarse cut on score alone, keeping every value tied at the boundary
+            threshold = np.partition(-score, limit - 1)[limit - 1]
+            keep = -score <= threshold
+            value_ids, score, word_count = value_ids[keep], score[keep], word_count[keep]
+        ranked = np.lexsort((value_ids, word_count, -score))[:limit]
+        return [(int(value_ids[i]), round(float(score[i]), 3)) for i in ranked]
+
+
+class FuzzySearch:
+    # Fuzzy indexes over the distinct medicine names, manufacturers and salts
+    FIELDS = ('name', 'salt', 'manufacturer')
+
+    def __init__(self, names, manufacturers, salts):
+        self.indexes = {
+            'name': FuzzyIndex(names),
+            'salt': FuzzyIndex(salts),
+            'manufacturer': FuzzyIndex(manufacturers)
+        }
+
+    def matches(self, query, limit=10):
+        # Best values across all fields as (field, value id, text, score);
+        # equal scores keep the field order name, salt, manufacturer
+        found = []
+        for rank, field in enumerate(self.FIELDS):
+            index = self.indexes[field]
+            for value_id, score in index.search(query, limit):
+                found.append((-score, rank, field, value_id, index.values.get(value_id)))
+        found.sort(key=lambda match: match[:2])
+        return [(field, value_id, text, -score) for score, _, field, value_id, text in found[:limit]]
+
+    def suggestions(self, query):
+        # Same shape as SearchIndex.suggestions: names, then manufacturers, then salts
+        suggestions = []
+        for field, limit in (('name', 10), ('manufacturer', 5), ('salt', 5)):
+            index = self.indexes[field]
+            suggestions.extend(index.values.get(value_id) for value_id, _ in index.search(query, limit))
+        return suggestions[:15]
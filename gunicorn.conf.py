@@ -0,0 +1,75 @@
+# Gunicorn settings (picked up automatically by `gunicorn app:app`).
+#
+# By default the dataset, its indexes and the dashboard snapshot are loaded once
+# in the master process before the workers fork, so every worker shares the
+# same physical pages. Set PHARMAVISION_PRELOAD=0 to make each worker load its
+# own copy instead. Workers and bind address follow gunicorn's usual
+# WEB_CONCURRENCY / PORT environment variables.
+#
+# With PHARMAVISION_DELTA_DIR set, the preloading master also applies the delta
+# files and then restarts the workers gracefully (SIGHUP), so they fork from
+# the updated copy and go on sharing it. Without preloading, every worker
+# applies the deltas to its own copy.
+import gc
+import os
+import signal
+import threading
+import time
+
+preload_app = os.environ.get('PHARMAVISION_PRELOAD', '1') != '0'
+
+if preload_app:
+    # Keep the collector from compacting freshly loaded objects in the master;
+    # freed holes and gc bookkeeping writes both defeat copy-on-write.
+    gc.disable()
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+
+    import app
+    if app.load_data():
+        server.log.info("Dataset preloaded in master")
+    else:
+        server.log.warning("Failed to preload dataset")
+
+    # Move everything allocated so far out of the collector's reach so the
+    # workers' collections never touch (and copy) the shared objects.
+    gc.freeze()
+
+    if os.environ.get('PHARMAVISION_DELTA_DIR'):
+        threading.Thread(target=watch_deltas, args=(server,), daemon=True).start()
+
+
+def watch_deltas(server):
+    import app
+    while True:
+        time.sleep(app.DELTA_POLL_SECONDS)
+        try:
+            if not app.apply_deltas():
+                continue
+            # Free the replaced version (frozen objects are never collected)
+            # before freezing the new one for the workers to share
+            gc.unfreeze()
+            gc.collect()
+            gc.freeze()
+            server.log.info("Deltas applied in master, restarting workers")
+            os.kill(os.getpid(), signal.SIGHUP)
+        except Exception:
+            # One bad delta must not stop the watcher
+            server.log.exception("Error applying deltas in master")
+
+
+def post_fork(server, worker):
+    if preload_app:
+        gc.enable()
+        # The master applies the deltas (see watch_deltas)
+        import app
+        app.worker_deltas = False
+
+
+def post_worker_init(worker):
+    import app
+    if app.analyzer is None:
+        app.load_data()
@@ -2,42 +2,140 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
-from collections import Counter
 import warnings
+from alternatives import AlternativeIndex
+from chart_report import CHARTS, ChartReport, draw_chart
+from compositions import CompositionEngine
+from compact_frame import CATEGORICAL_COLUMNS, compact_dtypes, memory_report, value_counts
+from dataset_cache import load_dataset
+from dataset_delta import apply_delta, read_delta
+from facet_index import FacetIndex
+from fuzzy_index import FuzzySearch
+from price_histogram import PriceHistogram
+from records import RecordStore
+from search_index import SearchIndex, ValueIndex
+from therapeutic import THERAPEUTIC_CLASSES, SaltIndex
 warnings.filterwarnings('ignore')
 
 class MedicineAnalyzer:
-    def __init__(self, csv_file):
-        self.df = pd.read_csv(csv_file)
+    def __init__(self, csv_file, use_cache=True, classes=None):
+        # The columnar cache next to the CSV is rebuilt whenever the CSV changes;
+        # classes ({name: salt terms}) adds therapeutic classes to the defaults
+        # (the dashboard uses 'paracetamol' and 'diabetes') or redefines them
+        if use_cache:
+            df = load_dataset(csv_file, categorical=CATEGORICAL_COLUMNS)
+        else:
+            df = pd.read_csv(csv_file)
+        self.df = compact_dtypes(df)
+        self.classes = classes
+        self.build_indexes()
         self.setup_plots()
     
+    def build_indexes(self, previous=None):
+        # Lookup structures for the web API, built once per dataset load.
+        # previous is the analyzer of the version a delta was applied to: the
+        # n-gram postings (by far the slowest part) are carried over for the
+        # values that did not change, everything else is cheap enough to rebuild.
+        self.search_index = SearchIndex(self.df, previous.search_index if previous else None)
+        self.name_index = ValueIndex(self.df['name'])
+        self.manufacturer_index = ValueIndex(self.df['manufacturer_name'])
+        self.composition1_index = ValueIndex(self.df['short_composition1'])
+        self.composition_engine = CompositionEngine(self.df)
+        # Classes registered on the previous version since it was built carry over
+        if previous:
+            classes = previous.salt_index.class_terms
+        else:
+            classes = dict(THERAPEUTIC_CLASSES, **(self.classes or {}))
+        self.salt_index = SaltIndex(self.composition_engine, classes)
+        self.records = RecordStore(self.df)
+        self.price_histogram = PriceHistogram(self.df['price(₹)'])
+        self.facet_index = FacetIndex(self.df, self.composition_engine, self.salt_index)
+        self.fuzzy_index = FuzzySearch(self.search_index.ngrams['name'].values.tolist(),
+                                       self.search_index.ngrams['manufacturer_name'].values.tolist(),
+                                       self.composition_engine.salts)
+        
+        # Position of every row in ascending price order (missing prices last)
+        prices = self.df['price(₹)'].to_numpy()
+        self.price_rank = np.empty(len(prices), dtype=np.int64)
+        self.price_rank[np.argsort(prices, kind='stable')] = np.arange(len(prices))
+        self.price_missing = np.isnan(prices)
+        self.alternative_index = AlternativeIndex(self.composition_engine, self.price_rank)
+    
+    def apply_delta(self, delta):
+        # A new analyzer with a delta (a DataFrame, or the path of a delta CSV)
+        # applied; this one is left untouched and can keep serving meanwhile
+        if isinstance(delta, str):
+            delta = read_delta(delta, self.df)
+        df, counts = apply_delta(self.df, delta)
+        updated = MedicineAnalyzer.__new__(MedicineAnalyzer)
+        updated.df = compact_dtypes(df)
+        updated.classes = self.classes
+        updated.delta_counts = counts
+        updated.build_indexes(previous=self)
+        return updated
+    
+    def therapeutic_class(self, name):
+        # Medicines in a registered therapeutic class, in dataset order
+        return self.df.iloc[self.salt_index.class_rows(name)]
+    
+    def fuzzy_rows(self, query, limit=10):
+        # Rows of the names, salts and manufacturers closest to query, best
+        # match first (dataset order within one match), and the matches
+        matches = self.fuzzy_index.matches(query, limit)
+        lookups = {
+            'name': lambda value_id, text: self.name_index.rows_for(text),
+            'salt': lambda value_id, text: self.salt_index.salt_rows(value_id),
+            'manufacturer': lambda value_id, text: self.manufacturer_index.rows_for(text)
+        }
+        rows = [lookups[field](value_id, text) for field, value_id, text, _ in matches]
+        rows = pd.unique(np.concatenate(rows)) if rows else np.empty(0, dtype=np.int64)
+        return rows, matches
+    
+    def order_rows(self, rows, sort=None, limit=None):
+        # First `limit` row ids ordered by 'price' / '-price', or in dataset order
+        if sort not in ('price', '-price'):
+            return rows if limit is None else rows[:limit]
+        
+        keys = self.price_rank[rows]
+        if sort == '-price':
+            keys = np.where(self.price_missing[rows], len(self.price_rank), -keys)
+        if limit is not None and limit < len(rows):
+            if limit == 0:
+                return rows[:0]
+            top = np.argpartition(keys, limit - 1)[:limit]
+            return rows[top[np.argsort(keys[top])]]
+        return rows[np.argsort(keys)]
+    
+    def memory_report(self):
+        return memory_report(self.df)
+    
     def setup_plots(self):
         plt.style.use('default')
         sns.set_palette("husl")
         
-    def manufacturer_analysis(self):
+    def plot_chart(self, name):
+        # Interactive: save the chart to the working directory and show it
+        filename, aggregate, _ = CHARTS[name]
+        draw_chart(name, aggregate(self), filename)
+        plt.show()
+        
+    def manufacturer_analysis(self, charts=True):
         print("=" * 60)
         print("1. MANUFACTURER ANALYSIS")
         print("=" * 60)
         
         # Top 15 manufacturers
-        top_manufacturers = self.df['manufacturer_name'].value_counts().head(15)
-        
-        plt.figure(figsize=(12, 8))
-        top_manufacturers.plot(kind='barh')
-        plt.title('Top 15 Manufacturers by Number of Medicines')
-        plt.xlabel('Number of Medicines')
-        plt.tight_layout()
-        plt.savefig('top_manufacturers.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        top_manufacturers = value_counts(self.df['manufacturer_name']).head(15)
+        
+        if charts:
+            self.plot_chart('top_manufacturers')
         
         print("\nTop 15 Manufacturers:")
         for i, (manufacturer, count) in enumerate(top_manufacturers.items(), 1):
             print(f"{i:2d}. {manufacturer}: {count} medicines")
         
         # Paracetamol price comparison
-        paracetamol_medicines = self.df[(self.df['short_composition1'].str.contains('Paracetamol', case=False, na=False)) | 
-                                        (self.df['short_composition2'].str.contains('Paracetamol', case=False, na=False))]
+        paracetamol_medicines = self.therapeutic_class('paracetamol')
         paracetamol_sorted = paracetamol_medicines[['name', 'manufacturer_name', 'price(₹)']].sort_values('price(₹)')
         
         print(f"\n\nParacetamol Medicines Price Comparison ({len(paracetamol_sorted)} medicines):")
@@ -48,21 +146,14 @@ class MedicineAnalyzer:
             print(f"{str(row['name'])[:29]:<30} {str(row['manufacturer_name'])[:24]:<25} {row['price(₹)']:<10}")
         
         # Cipla portfolio analysis
-        cipla_medicines = self.df[self.df['manufacturer_name'].str.contains('Cipla', case=False, na=False)]
-        cipla_compositions = []
-        for comp1 in cipla_medicines['short_composition1'].dropna():
-            cipla_compositions.append(str(comp1).strip())
-        for comp2 in cipla_medicines['short_composition2'].dropna():
-            if str(comp2) != 'nan':
-                cipla_compositions.append(str(comp2).strip())
-        
-        top_cipla_compositions = Counter(cipla_compositions).most_common(5)
+        cipla_mask = self.df['manufacturer_name'].str.contains('Cipla', case=False, na=False).to_numpy()
+        top_cipla_compositions = self.composition_engine.most_common(5, rows=cipla_mask)
         print(f"\n\nCipla Ltd - Top 5 Most Common Compositions:")
         print("-" * 50)
         for i, (comp, count) in enumerate(top_cipla_compositions, 1):
             print(f"{i}. {comp}: {count} medicines")
     
-    def price_analysis(self):
+    def price_analysis(self, charts=True):
         print("\n\n" + "=" * 60)
         print("2. PRICE ANALYSIS")
         print("=" * 60)
@@ -86,8 +177,7 @@ class MedicineAnalyzer:
             print(f"{str(row['name'])[:29]:<30} {str(row['manufacturer_name'])[:24]:<25} {row['price(₹)']:<10}")
         
         # High blood pressure medicines (using composition as proxy since no Uses column)
-        bp_medicines = self.df[(self.df['short_composition1'].str.contains('Amlodipine|Atenolol|Losartan|Telmisartan', case=False, na=False)) |
-                              (self.df['short_composition2'].str.contains('Amlodipine|Atenolol|Losartan|Telmisartan', case=False, na=False))]
+        bp_medicines = self.therapeutic_class('blood-pressure')
         if not bp_medicines.empty:
             bp_stats = {
                 'Average': bp_medicines['price(₹)'].mean(),
@@ -105,15 +195,8 @@ class MedicineAnalyzer:
                     print(f"{stat}: Rs{value:.2f}")
         
         # Price distribution histogram
-        plt.figure(figsize=(12, 6))
-        plt.hist(self.df['price(₹)'].dropna(), bins=50, edgecolor='black', alpha=0.7)
-        plt.title('Distribution of Medicine Prices')
-        plt.xlabel('Price (Rs)')
-        plt.ylabel('Frequency')
-        plt.yscale('log')
-        plt.tight_layout()
-        plt.savefig('price_distribution.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        if charts:
+            self.plot_chart('price_distribution')
     
     def therapeutic_analysis(self):
         print("\n\n" + "=" * 60)
@@ -121,8 +204,7 @@ class MedicineAnalyzer:
         print("=" * 60)
         
         # Diabetes medicines (using composition as proxy)
-        diabetes_medicines = self.df[(self.df['short_composition1'].str.contains('Glimepiride|Metformin|Insulin|Sitagliptin', case=False, na=False)) |
-                                     (self.df['short_composition2'].str.contains('Glimepiride|Metformin|Insulin|Sitagliptin', case=False, na=False))]
+        diabetes_medicines = self.therapeutic_class('diabetes')
         
         print(f"\nDiabetes Medicines ({len(diabetes_medicines)} found):")
         print("-" * 90)
@@ -133,14 +215,15 @@ class MedicineAnalyzer:
             print(f"{str(row['name'])[:24]:<25} {str(row['manufacturer_name'])[:19]:<20} {comp[:39]:<40}")
         
         # Most versatile medicines (based on composition complexity)
-        medicine_complexity = {}
-        for _, row in self.df.iterrows():
-            complexity = 1 if pd.notna(row['short_composition1']) else 0
-            complexity += 1 if pd.notna(row['short_composition2']) and str(row['short_composition2']) != 'nan' else 0
-            if complexity > 0:
-                medicine_complexity[row['name']] = complexity
-        
-        top_versatile = sorted(medicine_complexity.items(), key=lambda x: x[1], reverse=True)[:10]
+        # Per distinct name (first-seen order) the complexity of its last row,
+        # then a stable sort, as the old name -> complexity dict produced
+        complexity = self.composition_engine.composition_complexity()
+        has_composition = complexity > 0
+        name_codes, names = pd.factorize(self.df['name'][has_composition], use_na_sentinel=False)
+        _, last_from_end = np.unique(name_codes[::-1], return_index=True)
+        name_complexity = complexity[has_composition][len(name_codes) - 1 - last_from_end]
+        top = np.argsort(-name_complexity, kind='stable')[:10]
+        top_versatile = [(names[i], name_complexity[i]) for i in top]
         
         print(f"\n\nTop 10 Most Complex Medicines (Multiple Compositions):")
         print("-" * 60)
@@ -149,30 +232,16 @@ class MedicineAnalyzer:
         for medicine, comp_count in top_versatile:
             print(f"{str(medicine)[:34]:<35} {comp_count:<15}")
     
-    def chemical_analysis(self):
+    def chemical_analysis(self, charts=True):
         print("\n\n" + "=" * 60)
         print("4. CHEMICAL COMPOSITION (SALT) ANALYSIS")
         print("=" * 60)
         
         # Most common compositions
-        all_compositions = []
-        for comp in self.df['short_composition1'].dropna():
-            all_compositions.append(str(comp).strip())
-        for comp in self.df['short_composition2'].dropna():
-            if str(comp) != 'nan':
-                all_compositions.append(str(comp).strip())
-        
-        composition_counts = pd.Series(all_compositions).value_counts().head(15)
-        
-        plt.figure(figsize=(14, 8))
-        composition_counts.plot(kind='bar')
-        plt.title('Top 15 Most Common Chemical Compositions')
-        plt.xlabel('Chemical Composition')
-        plt.ylabel('Frequency')
-        plt.xticks(rotation=45, ha='right')
-        plt.tight_layout()
-        plt.savefig('common_compositions.png', dpi=300, bbox_inches='tight')
-        plt.show()
+        composition_counts = self.composition_engine.composition_counts().head(15)
+        
+        if charts:
+            self.plot_chart('common_compositions')
         
         print("\nTop 15 Most Common Chemical Compositions:")
         print("-" * 60)
@@ -180,8 +249,7 @@ class MedicineAnalyzer:
             print(f"{i:2d}. {str(composition)[:50]}: {count}")
         
         # Diclofenac medicines
-        diclofenac_medicines = self.df[(self.df['short_composition1'].str.contains('Diclofenac', case=False, na=False)) |
-                                       (self.df['short_composition2'].str.contains('Diclofenac', case=False, na=False))]
+        diclofenac_medicines = self.therapeutic_class('diclofenac')
         
         print(f"\n\nMedicines containing Diclofenac ({len(diclofenac_medicines)} found):")
         print("-" * 80)
@@ -206,28 +274,41 @@ class MedicineAnalyzer:
         for stat, value in summary_stats.items():
             print(f"{stat}: {value}")
     
-    def run_full_analysis(self):
+    def run_full_analysis(self, batch=False, output_dir='.', workers=None):
+        # batch=True renders the charts headless in a process pool while the
+        # text report prints, skipping charts whose data has not changed
         print("COMPREHENSIVE MEDICINE DATASET ANALYSIS")
         print("=" * 60)
         
-        self.manufacturer_analysis()
-        self.price_analysis()
+        report = ChartReport(self, output_dir, workers).start() if batch else None
+        charts = not batch
+        
+        self.manufacturer_analysis(charts)
+        self.price_analysis(charts)
         self.therapeutic_analysis()
-        self.chemical_analysis()
+        self.chemical_analysis(charts)
         self.generate_summary()
         
+        if report:
+            report.finish()
         print(f"\n\nAnalysis complete! Charts saved as PNG files.")
 
 # Usage
 if __name__ == "__main__":
     try:
         import os
+        import sys
         # Get the absolute path to the CSV file
         BASE_DIR = os.path.dirname(os.path.abspath(__file__))
         csv_path = os.path.join(BASE_DIR, 'A_Z_medicines_dataset_of_India.csv')
         
         analyzer = MedicineAnalyzer(csv_path)
-        analyzer.run_full_analysis()
+        # python medicine_analysis.py --batch [output_dir]
+        if '--batch' in sys.argv:
+            args = sys.argv[sys.argv.index('--batch') + 1:]
+            analyzer.run_full_analysis(batch=True, output_dir=args[0] if args else 'report')
+        else:
+            analyzer.run_full_analysis()
     except FileNotFoundError:
         print("Error: 'A_Z_medicines_dataset_of_India.csv' file not found!")
         print("Please ensure the CSV file is in the same directory as this script.")
@@ -0,0 +1,188 @@
+import bisect
+import os
+import sys
+import threading
+import time
+from collections import Counter as StackCounts
+
+# Seconds; the last bucket (+Inf) is implied
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values, *extra):
+    # extra: label pairs already formatted, appended as they are
+    pairs = [f'{name}="{escape_label(value)}"' for name, value in zip(names, values)]
+    pairs.extend(pair for pair in extra if pair)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    # collect, if given, returns further {label values: value} read at scrape
+    # time, for counts kept elsewhere (an lru_cache's hits, say)
+    def __init__(self, name, help, labels=(), collect=None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self, constant=''):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self.lock:
+            values = dict(self.values)
+        if self.collect:
+            values.update(self.collect())
+        for label_values, value in sorted(values.items()):
+            lines.append(f'{self.name}{format_labels(self.labels, label_values, constant)} {format_value(value)}')
+        return lines
+
+
+class Gauge:
+    # Values read at scrape time: collect() returns {label values: value}
+    def __init__(self, name, help, labels=(), collect=None):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.collect = collect
+
+    def render(self, constant=''):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} gauge']
+        for label_values, value in sorted(self.collect().items()):
+            lines.append(f'{self.name}{format_labels(self.labels, label_values, constant)} {format_value(value)}')
+        return lines
+
+
+class Histogram:
+    # Cumulative buckets are only summed up at scrape time; an observation
+    # is one bisect and three additions under the lock
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        slot = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = self.series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][slot] += 1
+            series[1] += value
+
+    def render(self, constant=''):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self.lock:
+            series = [(label_values, list(counts), total) for label_values, (counts, total) in sorted(self.series.items())]
+        for label_values, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = 'le="' + format_value(bound) + '"'
+                lines.append(f'{self.name}_bucket{format_labels(self.labels, label_values, constant, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{format_labels(self.labels, label_values, constant)} {format_value(total)}')
+            lines.append(f'{self.name}_count{format_labels(self.labels, label_values, constant)} {cumulative}')
+        return lines
+
+
+class Registry:
+    # constant_labels, if given, returns {name: value} added to every series
+    # at scrape time, e.g. the pid of the worker process that answered
+    def __init__(self, constant_labels=None):
+        self.metrics = []
+        self.constant_labels = constant_labels
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        labels = self.constant_labels() if self.constant_labels else {}
+        constant = ','.join(f'{name}="{escape_label(value)}"' for name, value in labels.items())
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render(constant))
+        return '\n'.join(lines) + '\n'
+
+
+def frame_label(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+class StackSampler:
+    # Opt-in sampling profiler. Threads register the route they are serving;
+    # a daemon thread wakes every interval seconds and records the Python
+    # stack of each of them. Stacks are kept per route in the collapsed
+    # format flamegraph.pl and speedscope read: "outer;...;inner count".
+    def __init__(self, routes, interval=0.005):
+        self.routes = routes
+        self.interval = interval
+        self.active = {}
+        self.stacks = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def wants(self, route):
+        return '*' in self.routes or route in self.routes
+
+    def track(self, route):
+        if self.thread is None:
+            self.start()
+        self.active[threading.get_ident()] = route
+
+    def untrack(self):
+        self.active.pop(threading.get_ident(), None)
+
+    def start(self):
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True)
+                self.thread.start()
+
+    def run(self):
+        while True:
+            time.sleep(self.interval)
+            if self.active:
+                self.sample()
+
+    def sample(self):
+        frames = sys._current_frames()
+        for ident, route in list(self.active.items()):
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(frame_label(frame))
+                frame = frame.f_back
+            with self.lock:
+                self.stacks.setdefault(route, StackCounts())[';'.join(reversed(stack))] += 1
+
+    def folded(self, route, reset=False):
+        with self.lock:
+            stacks = self.stacks.get(route, StackCounts())
+            if reset:
+                self.stacks.pop(route, None)
+        return ''.join(f'{stack} {count}\n' for stack, count in sorted(stacks.items()))
@@ -0,0 +1,38 @@
+import numpy as np
+
+
+class PackedStrings:
+    # A list of strings held as one UTF-8 bytes buffer plus an int64 offsets
+    # array. However many strings it holds it is a handful of Python objects,
+    # so forked workers can read it without refcount updates dirtying the
+    # shared pages. Items come back as bytes; UTF-8 bytes sort and match
+    # substrings exactly like the strings they encode.
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+        self._bounds = memoryview(offsets)
+
+    @classmethod
+    def from_strings(cls, values):
+        encoded = [value.encode('utf-8') for value in values]
+        return cls.from_bytes(encoded)
+
+    @classmethod
+    def from_bytes(cls, encoded):
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(item) for item in encoded], out=offsets[1:])
+        return cls(b''.join(encoded), offsets)
+
+    def __len__(self):
+        return len(self._bounds) - 1
+
+    def __getitem__(self, i):
+        return self.data[self._bounds[i]:self._bounds[i + 1]]
+
+    def get(self, i):
+        return self[i].decode('utf-8')
+
+    def tolist(self):
+        bounds = self.offsets.tolist()
+        data = self.data
+        return [data[start:end].decode('utf-8') for start, end in zip(bounds[:-1], bounds[1:])]
@@ -0,0 +1,69 @@
+import csv
+import io
+
+import numpy as np
+
+from records import MEDICINE_FIELDS
+
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_ROWS = 1000
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+
+def parse_cursor(cursor):
+    # A cursor is the row id of the last record on the previous page; pages are
+    # in row order, so the next one starts at the first match after it.
+    # None for a missing or malformed cursor.
+    if not cursor:
+        return -1
+    if not (cursor.isascii() and cursor.isdigit()):
+        return None
+    return int(cursor)
+
+
+def page_rows(rows, limit, after=-1, offset=0, is_sorted=False):
+    # One page of row ids in row order: skip every row up to and including
+    # after, then offset more, then take limit. Returns the page and whether
+    # any matches remain after it.
+    rows = np.asarray(rows)
+    if after >= 0:
+        if is_sorted:
+            rows = rows[np.searchsorted(rows, after, side='right'):]
+        else:
+            rows = rows[rows > after]
+    end = offset + limit
+    has_more = len(rows) > end
+    if not is_sorted:
+        # Only the smallest end ids need to be in order
+        if has_more and end > 0:
+            rows = np.partition(rows, end - 1)[:end]
+        rows = np.sort(rows)
+    return rows[offset:end], has_more
+
+
+def next_cursor(page, has_more):
+    if not has_more or not len(page):
+        return None
+    return str(int(page[-1]))
+
+
+def export_chunks(records, rows, export_format, chunk_rows=EXPORT_CHUNK_ROWS):
+    # Streamed export body for sorted row ids, encoded one slice at a time so
+    # neither the records nor the whole body are ever held in memory
+    if export_format == 'csv':
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(MEDICINE_FIELDS)
+        if not len(rows):
+            yield buffer.getvalue().encode('utf-8')
+        for start in range(0, len(rows), chunk_rows):
+            writer.writerows(records.values(rows[start:start + chunk_rows]))
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    else:
+        for start in range(0, len(rows), chunk_rows):
+            yield b''.join(fragment + b'\n' for fragment in records.fragments(rows[start:start + chunk_rows]))
@@ -0,0 +1,80 @@
+import numpy as np
+
+HISTOGRAM_SCALES = ('linear', 'log')
+DEFAULT_BINS = 20
+MAX_BINS = 1000
+# The dashboard chart: 20 bins of ₹50 up to ₹1000
+DEFAULT_LINEAR_RANGE = (0.0, 1000.0)
+PERCENTILES = (50, 90, 99)
+
+
+def parse_number(value, kind, message):
+    # A query string number (or a number); None when not given, ValueError
+    # with message when it does not parse
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise ValueError(message)
+
+
+class PriceHistogram:
+    # Price distribution summaries computed on the server, so clients get bin
+    # counts instead of every price
+    def __init__(self, prices):
+        prices = np.asarray(prices, dtype=np.float64)
+        self.prices = np.sort(prices[np.isfinite(prices)])
+        positive = self.prices[np.searchsorted(self.prices, 0, side='right'):]
+        # Default log range: the smallest and largest positive prices
+        self.log_range = (positive[0], positive[-1]) if len(positive) else (1.0, 10.0)
+
+    def percentiles(self):
+        if not len(self.prices):
+            return {f'p{p}': None for p in PERCENTILES}
+        values = np.percentile(self.prices, PERCENTILES)
+        return {f'p{p}': round(float(value), 2) for p, value in zip(PERCENTILES, values)}
+
+    def resolve(self, bins=None, scale='linear', low=None, high=None):
+        # Fill in defaults and validate; raises ValueError with a message for the
+        # client. bins, low and high may be raw query string values.
+        bins = parse_number(bins, int, 'bins must be a whole number')
+        low = parse_number(low, float, 'min and max must be numbers')
+        high = parse_number(high, float, 'min and max must be numbers')
+        bins = DEFAULT_BINS if bins is None else bins
+        if not 1 <= bins <= MAX_BINS:
+            raise ValueError(f'bins must be between 1 and {MAX_BINS}')
+        if scale not in HISTOGRAM_SCALES:
+            raise ValueError(f'Unknown scale: {scale}')
+
+        if scale == 'log':
+            default_low, default_high = self.log_range
+        else:
+            default_low, default_high = DEFAULT_LINEAR_RANGE
+        low = float(default_low if low is None else low)
+        high = float(default_high if high is None else high)
+        if not np.isfinite(low) or not np.isfinite(high):
+            raise ValueError('min and max must be numbers')
+        if low >= high:
+            raise ValueError('min must be less than max')
+        if scale == 'log' and low <= 0:
+            raise ValueError('log scale needs a positive min')
+        return bins, scale, low, high
+
+    def histogram(self, bins, scale, low, high):
+        if scale == 'log':
+            edges = np.geomspace(low, high, bins + 1)
+        else:
+            edges = np.linspace(low, high, bins + 1)
+        # np.histogram bins are half-open except the last, which includes high
+        counts, edges = np.histogram(self.prices, bins=edges)
+        return {
+            'scale': scale,
+            'bins': bins,
+            'range': [low, high],
+            'edges': [round(edge, 2) for edge in edges.tolist()],
+            'counts': counts.tolist(),
+            'below': int(np.searchsorted(self.prices, low, side='left')),
+            'above': int(len(self.prices) - np.searchsorted(self.prices, high, side='right')),
+            'total': len(self.prices)
+        }
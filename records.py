@@ -0,0 +1,106 @@
+import json
+from json.encoder import encode_basestring_ascii
+
+import numpy as np
+import pandas as pd
+
+from compact_frame import codes_and_labels
+from packed_strings import PackedStrings
+
+# Record shapes the API returns, as JSON keys (the store keeps them sorted the
+# way jsonify() does)
+MEDICINE_FIELDS = ('name', 'manufacturer', 'composition', 'price', 'pack_size', 'type', 'discontinued')
+SIBLING_FIELDS = ('name', 'price', 'pack_size')
+ALTERNATIVE_FIELDS = ('name', 'manufacturer', 'price')
+SUBSTITUTE_FIELDS = ('name', 'manufacturer', 'price', 'pack_size', 'type', 'discontinued')
+
+# JSON key -> dataset column ('composition' is derived from both composition columns)
+FIELD_COLUMNS = {
+    'name': 'name',
+    'manufacturer': 'manufacturer_name',
+    'price': 'price(₹)',
+    'pack_size': 'pack_size_label',
+    'type': 'type',
+    'discontinued': 'Is_discontinued'
+}
+
+
+def encode_value(value):
+    # Same text json.dumps / jsonify() produce for a scalar
+    if type(value) is str:
+        return encode_basestring_ascii(value)
+    if isinstance(value, np.generic):
+        value = value.item()
+    return json.dumps(value)
+
+
+def composition_display(df):
+    # "<composition1> + <composition2>" per row, or just the first when the
+    # second is missing (a missing first composition prints as 'nan')
+    codes1, labels1 = codes_and_labels(df['short_composition1'])
+    codes2, labels2 = codes_and_labels(df['short_composition2'])
+    pairs, unique_pairs = pd.factorize(codes1.astype(np.int64) * (len(labels2) + 1) + codes2 + 1)
+
+    labels = []
+    for pair in unique_pairs.tolist():
+        code1, code2 = divmod(pair, len(labels2) + 1)
+        comp = f"{labels1[code1] if code1 >= 0 else np.nan}"
+        second = labels2[code2 - 1] if code2 > 0 else np.nan
+        if pd.notna(second) and str(second) != 'nan':
+            comp += f" + {second}"
+        labels.append(comp)
+    return pairs, labels
+
+
+class EncodedField:
+    # One JSON-encoded text per distinct value, plus each row's value code
+    def __init__(self, codes, labels):
+        self.codes = np.asarray(codes, dtype=np.int32)
+        self.labels = [label.item() if isinstance(label, np.generic) else label for label in labels] + [None]
+        # Code -1 (missing) encodes as NaN, as jsonify() writes a missing value
+        self.encoded = PackedStrings.from_strings([encode_value(label) for label in labels] + ['NaN'])
+
+    def texts(self, rows):
+        codes = self.codes[rows]
+        encoded = self.encoded
+        missing = len(encoded) - 1
+        return [encoded[code if code >= 0 else missing] for code in codes.tolist()]
+
+    def values(self, rows):
+        # Plain Python values, None where missing
+        labels = self.labels
+        return [labels[code] for code in self.codes[rows].tolist()]
+
+
+class RecordStore:
+    # Pre-encoded display records: a response is assembled by slicing row ids
+    # and joining bytes, with no per-request pandas row access or JSON encoding.
+    def __init__(self, df):
+        self.fields = {}
+        for key, column in FIELD_COLUMNS.items():
+            self.fields[key] = EncodedField(*codes_and_labels(df[column]))
+        self.fields['composition'] = EncodedField(*composition_display(df))
+        self.keys = {key: encode_basestring_ascii(key).encode('ascii') + b':' for key in self.fields}
+
+    def fragments(self, rows, fields=MEDICINE_FIELDS, extra=None):
+        # One JSON object (bytes) per row, keys sorted like jsonify(); extra
+        # maps further keys to one computed value per row
+        rows = np.asarray(rows, dtype=np.int64)
+        extra = extra or {}
+        columns = []
+        for key in sorted([*fields, *extra]):
+            if key in extra:
+                prefix = encode_basestring_ascii(key).encode('ascii') + b':'
+                columns.append([prefix + encode_value(value).encode('ascii') for value in extra[key]])
+            else:
+                columns.append([self.keys[key] + text for text in self.fields[key].texts(rows)])
+        return [b'{' + b','.join(parts) + b'}' for parts in zip(*columns)]
+
+    def values(self, rows, fields=MEDICINE_FIELDS):
+        # One tuple of plain values per row, in fields order
+        rows = np.asarray(rows, dtype=np.int64)
+        return list(zip(*[self.fields[key].values(rows) for key in fields]))
+
+    def array(self, rows, fields=MEDICINE_FIELDS, extra=None):
+        # JSON array of the records for rows
+        return b'[' + b','.join(self.fragments(rows, fields, extra)) + b']'
@@ -0,0 +1,224 @@
+import bisect
+import re
+
+import numpy as np
+import pandas as pd
+
+from compact_frame import codes_and_labels
+from packed_strings import PackedStrings
+
+# Columns the dashboard search box looks at
+SEARCH_COLUMNS = ['name', 'manufacturer_name', 'short_composition1']
+
+# Upper bound for a prefix range: 0xff never occurs in UTF-8
+PREFIX_END = b'\xff'
+
+# Characters that make a query behave differently as a regex than as plain text
+REGEX_SPECIAL = set('.^$*+?{}[]\\|()')
+
+EMPTY_IDS = np.empty(0, dtype=np.int64)
+
+
+def is_literal(query):
+    return not any(ch in REGEX_SPECIAL for ch in query)
+
+
+def unique_strings(values):
+    # Distinct string values in order of first appearance (what Series.unique() returns)
+    return [value for value in pd.unique(values) if isinstance(value, str)]
+
+
+class PrefixIndex:
+    # Lower-cased keys kept in sorted order next to the id they came from.
+    # A prefix lookup is two bisects; the smallest ids in that range are the
+    # first matches in the original order.
+    def __init__(self, values):
+        keys = []
+        ids = []
+        for i, value in enumerate(values):
+            if isinstance(value, str):
+                keys.append(value.lower().encode('utf-8'))
+                ids.append(i)
+
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.keys = PackedStrings.from_bytes([keys[i] for i in order])
+        self.ids = np.asarray(ids, dtype=np.int64)[order] if ids else EMPTY_IDS
+
+    def matches(self, prefix):
+        # Ids of every key starting with prefix, in key order
+        prefix = prefix.lower().encode('utf-8')
+        lo = bisect.bisect_left(self.keys, prefix)
+        hi = bisect.bisect_left(self.keys, prefix + PREFIX_END, lo)
+        return self.ids[lo:hi]
+
+    def search(self, prefix, limit=None):
+        ids = self.matches(prefix)
+        if limit is not None and len(ids) > limit:
+            ids = np.partition(ids, limit - 1)[:limit]
+        return np.sort(ids)
+
+
+class NgramIndex:
+    # Inverted index from every 2- and 3-character gram to the ids of the
+    # values containing it, stored as one flat postings array plus offsets.
+    # Given the index of a previous version of the data, grams are only
+    # extracted for values it did not have; the rest of its postings are
+    # renumbered to the new value ids.
+    def __init__(self, values, previous=None):
+        lowered = [value.lower() for value in values]
+        self.values = PackedStrings.from_strings(values)
+        self.lowered = PackedStrings.from_strings(lowered)
+        if previous is not None:
+            self._update(previous, values, lowered)
+            return
+
+        flat = []
+        counts = []
+        for text in lowered:
+            grams = {text[i:i + n] for n in (2, 3) for i in range(len(text) - n + 1)}
+            flat.extend(grams)
+            counts.append(len(grams))
+
+        codes, uniques = pd.factorize(np.array(flat, dtype=object))
+        self.grams = dict(zip(uniques, range(len(uniques))))
+        owners = np.repeat(np.arange(len(values), dtype=np.int64), counts)
+        # Stable sort keeps each postings list in ascending id order
+        order = np.argsort(codes, kind='stable')
+        self.postings = owners[order]
+        counts = np.bincount(codes, minlength=len(uniques))
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def _update(self, previous, values, lowered):
+        previous_ids = {value: i for i, value in enumerate(previous.values.tolist())}
+        renumber = np.full(len(previous.values), -1, dtype=np.int64)
+        self.grams = dict(previous.grams)
+
+        codes = []
+        owners = []
+        for i, value in enumerate(values):
+            old = previous_ids.get(value)
+            if old is not None:
+                renumber[old] = i
+                continue
+            text = lowered[i]
+            for gram in {text[j:j + n] for n in (2, 3) for j in range(len(text) - n + 1)}:
+                codes.append(self.grams.setdefault(gram, len(self.grams)))
+                owners.append(i)
+
+        # (gram, id) pairs of the values still present plus the new ones, as
+        # one int64 key each; sorting the keys groups by gram with ids ascending
+        old_codes = np.repeat(np.arange(len(previous.offsets) - 1, dtype=np.int64), np.diff(previous.offsets))
+        old_owners = renumber[previous.postings]
+        kept = old_owners >= 0
+        width = max(len(values), 1)
+        keys = np.concatenate((old_codes[kept] * width + old_owners[kept],
+                               np.asarray(codes, dtype=np.int64) * width + np.asarray(owners, dtype=np.int64)))
+        keys.sort()
+        self.postings = keys % width
+        counts = np.bincount(keys // width, minlength=len(self.grams))
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def _postings(self, gram):
+        code = self.grams.get(gram)
+        if code is None:
+            return EMPTY_IDS
+        return self.postings[self.offsets[code]:self.offsets[code + 1]]
+
+    def _gram_lists(self, query):
+        n = 2 if len(query) == 2 else 3
+        grams = {query[i:i + n] for i in range(len(query) - n + 1)}
+        return sorted((self._postings(gram) for gram in grams), key=len)
+
+    def _candidate_chunks(self, query, size=256):
+        # Walk the rarest gram's postings in id order, dropping ids missing
+        # from the other grams' postings before the text itself is checked
+        if len(query) < 2:
+            for start in range(0, len(self.values), size):
+                yield range(start, min(start + size, len(self.values)))
+            return
+
+        rarest, *others = self._gram_lists(query)
+        if any(len(other) == 0 for other in others):
+            return
+        for start in range(0, len(rarest), size):
+            chunk = rarest[start:start + size]
+            for other in others:
+                pos = np.searchsorted(other, chunk)
+                pos[pos == len(other)] = 0
+                chunk = chunk[other[pos] == chunk]
+            yield chunk.tolist()
+
+    def search(self, query, limit):
+        query = query.lower()
+        needle = query.encode('utf-8')
+        results = []
+        for chunk in self._candidate_chunks(query):
+            for vid in chunk:
+                if needle in self.lowered[vid]:
+                    results.append(self.values.get(vid))
+                    if len(results) == limit:
+                        return results
+        return results
+
+    def regex_search(self, pattern, limit):
+        # Same semantics as Series.str.contains(pattern, case=False)
+        regex = re.compile(pattern, flags=re.IGNORECASE)
+        results = []
+        for value in self.values.tolist():
+            if regex.search(value):
+                results.append(value)
+                if len(results) == limit:
+                    break
+        return results
+
+
+class ValueIndex:
+    # Hash index from an exact column value to the ids of the rows holding
+    # it, in dataset order; one flat array sliced by per-value offsets.
+    def __init__(self, series):
+        codes, labels = codes_and_labels(series)
+        self.codes = {label: code for code, label in enumerate(labels)}
+        # Missing values (code -1) sort first and are dropped
+        order = np.argsort(codes, kind='stable')
+        self.rows = order[np.count_nonzero(codes < 0):].astype(np.int64)
+        counts = np.bincount(codes[codes >= 0], minlength=len(labels))
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+    def rows_for(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            return EMPTY_IDS
+        return self.rows[self.offsets[code]:self.offsets[code + 1]]
+
+
+class SearchIndex:
+    # previous: the index of an earlier version of the data, whose n-gram
+    # postings are reused for the values both versions share
+    def __init__(self, df, previous=None):
+        self.name_prefix = PrefixIndex(df['name'])
+
+        self.ngrams = {}
+        for column in SEARCH_COLUMNS:
+            values = unique_strings(df[column])
+            self.ngrams[column] = NgramIndex(values, previous.ngrams[column] if previous else None)
+
+    def search_names(self, prefix, limit=50):
+        # Row positions whose name starts with prefix (case-insensitive), in row order
+        return self.name_prefix.search(prefix, limit)
+
+    def name_matches(self, prefix):
+        # Every row position whose name starts with prefix, unordered
+        return self.name_prefix.matches(prefix)
+
+    def contains(self, column, query, limit):
+        # Distinct values containing query, in order of first appearance
+        index = self.ngrams[column]
+        if is_literal(query):
+            return index.search(query, limit)
+        return index.regex_search(query, limit)
+
+    def suggestions(self, query):
+        suggestions = (self.contains('name', query, 10) +
+                       self.contains('manufacturer_name', query, 5) +
+                       self.contains('short_composition1', query, 5))
+        return suggestions[:15]
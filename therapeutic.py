@@ -0,0 +1,114 @@
+import json
+import re
+
+import numpy as np
+
+# Therapeutic classes, each defined by salt-name terms (matched case-insensitively
+# anywhere in the salt name, so 'Insulin' covers every insulin salt)
+THERAPEUTIC_CLASSES = {
+    'paracetamol': ['Paracetamol'],
+    'blood-pressure': ['Amlodipine', 'Atenolol', 'Losartan', 'Telmisartan'],
+    'diabetes': ['Glimepiride', 'Metformin', 'Insulin', 'Sitagliptin'],
+    'diclofenac': ['Diclofenac'],
+}
+
+EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+
+def load_classes(path):
+    # Therapeutic classes from a JSON file: {"class name": ["salt term", ...]}
+    with open(path, encoding='utf-8') as f:
+        classes = json.load(f)
+    if not isinstance(classes, dict) or not all(
+            isinstance(terms, list) and terms and all(isinstance(term, str) and term for term in terms)
+            for terms in classes.values()):
+        raise ValueError(f'{path}: expected {{"class": ["salt term", ...]}}')
+    return classes
+
+
+def union(row_lists):
+    row_lists = [rows for rows in row_lists if len(rows)]
+    if not row_lists:
+        return EMPTY_ROWS
+    if len(row_lists) == 1:
+        return row_lists[0]
+    # The inputs are sorted runs, which a stable (merge) sort joins in linear time
+    rows = np.sort(np.concatenate(row_lists), kind='stable')
+    keep = np.ones(len(rows), dtype=bool)
+    keep[1:] = rows[1:] != rows[:-1]
+    return rows[keep]
+
+
+def intersection(row_lists):
+    row_lists = sorted(row_lists, key=len)
+    if not row_lists:
+        return EMPTY_ROWS
+    result = row_lists[0]
+    for rows in row_lists[1:]:
+        if not len(result) or not len(rows):
+            return EMPTY_ROWS
+        # Binary-search the smaller sorted list in the larger one
+        pos = np.minimum(np.searchsorted(rows, result), len(rows) - 1)
+        result = result[rows[pos] == result]
+    return result
+
+
+class SaltIndex:
+    # Inverted index from salt id to the sorted row ids of the medicines that
+    # contain it (in either composition slot), plus the row sets of the
+    # registered therapeutic classes, resolved once per load. class_terms
+    # keeps each class's terms so a rebuilt index can register them again.
+    def __init__(self, engine, classes=None):
+        table = engine.salt_table
+        salt_ids = table['salt_id'].to_numpy()
+        rows = table['row'].to_numpy().astype(np.int64)
+
+        # Sort by (salt, row) and drop a row listed twice under the same salt
+        order = np.lexsort((rows, salt_ids))
+        salt_ids, rows = salt_ids[order], rows[order]
+        keep = np.ones(len(rows), dtype=bool)
+        keep[1:] = (salt_ids[1:] != salt_ids[:-1]) | (rows[1:] != rows[:-1])
+        salt_ids, self.rows = salt_ids[keep], rows[keep]
+
+        counts = np.bincount(salt_ids, minlength=len(engine.salts))
+        self.offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.salts = engine.salts
+        self.salt_ids = {salt.casefold(): i for i, salt in enumerate(engine.salts)}
+
+        self.classes = {}
+        self.class_terms = {}
+        self.class_row_sets = {}
+        for name, terms in (THERAPEUTIC_CLASSES if classes is None else classes).items():
+            self.register_class(name, terms)
+
+    def salt_rows(self, salt_id):
+        return self.rows[self.offsets[salt_id]:self.offsets[salt_id + 1]]
+
+    def find_salts(self, terms):
+        # Salt ids whose name contains any of the terms (case-insensitive)
+        pattern = re.compile('|'.join(re.escape(term) for term in terms), flags=re.IGNORECASE)
+        return [i for i, salt in enumerate(self.salts) if pattern.search(salt)]
+
+    def register_class(self, name, terms):
+        salt_ids = self.find_salts(terms)
+        self.classes[name] = salt_ids
+        self.class_terms[name] = list(terms)
+        self.class_row_sets[name] = union(self.salt_rows(i) for i in salt_ids)
+
+    def class_rows(self, name):
+        # Sorted row ids of every medicine in the class; KeyError if unknown
+        return self.class_row_sets[name]
+
+    def query(self, expression):
+        # Salt query: AND-groups joined by '|', salts inside a group joined by ','.
+        # 'Paracetamol,Caffeine|Ibuprofen' is (Paracetamol AND Caffeine) OR Ibuprofen.
+        # Salt names match exactly, ignoring case; an unknown salt matches nothing.
+        groups = []
+        for group in expression.split('|'):
+            names = [name.strip().casefold() for name in group.split(',') if name.strip()]
+            if not names:
+                continue
+            if any(name not in self.salt_ids for name in names):
+                continue
+            groups.append(intersection([self.salt_rows(self.salt_ids[name]) for name in names]))
+        return union(groups)